@@ -6,7 +6,7 @@ from main import clean_column
 import logging
 import os
 import random
-from get_file_names import get_file_names
+from get_file_names import get_file_names, read_extraction_file, EXTRACTION_EXTENSIONS
 from tqdm import tqdm
 
 
@@ -78,7 +78,7 @@ def _correct(X, y):
 
 def create_from_extraction_data(file_path: str, clean_data=False) -> pl.DataFrame:
     """
-    Given a .csv file (`file_path`) with X, y pairs from a Wikipedia extraction, and with the following structure:
+    Given a .csv or .parquet file (`file_path`) with X, y pairs from a Wikipedia extraction, and with the following structure:
         - `Thies is th ancient correction` --> `This is th ancient correction`
         - `This is th ancient correction` --> `This is the ancient correction`
     
@@ -89,7 +89,7 @@ def create_from_extraction_data(file_path: str, clean_data=False) -> pl.DataFram
         logging.warning("File %s doesnt exist", file_path)
         return None
     
-    data = pl.read_csv(file_path)
+    data = read_extraction_file(file_path)
     Ys = pl.Series(preprocess_y(data))
     if clean_data:
         Ys = clean_column(Ys)
@@ -109,7 +109,7 @@ if __name__ == '__main__':
     # Maximum length of collected sentences.
     MAX_SENTS = 4_900_000
 
-    files_to_extract = get_file_names(source, extension=".csv")
+    files_to_extract = get_file_names(source, extension=EXTRACTION_EXTENSIONS)
     
     random.shuffle(files_to_extract)
 
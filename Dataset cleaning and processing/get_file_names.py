@@ -1,7 +1,11 @@
 """
-A function used by multiple files.
+Functions used by multiple files.
 """
 import os
+import polars as pl
+
+# Extensions of the result files of an extraction (see output_format in Extraction code/main.py).
+EXTRACTION_EXTENSIONS = (".csv", ".parquet")
 
 def get_file_names(source: str, extension=".csv") -> list[str]:
     """
@@ -17,3 +21,14 @@ def get_file_names(source: str, extension=".csv") -> list[str]:
                 result.append(file_path)
     
     return result
+
+
+def read_extraction_file(file_path: str) -> pl.DataFrame:
+    """
+    Reads a result file of an extraction, in csv or parquet format. The csv files have an unnamed index column in first position, an equivalent column is added to the parquet files so that both formats have the same columns and types.
+    """
+    if file_path.endswith(".parquet"):
+        # The dictionary encoded columns are read as categoricals.
+        data = pl.read_parquet(file_path).with_columns(pl.col(pl.Categorical).cast(pl.Utf8))
+        return pl.concat([pl.Series("", range(len(data))).to_frame(), data], how="horizontal")
+    return pl.read_csv(file_path)
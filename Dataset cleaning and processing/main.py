@@ -5,7 +5,7 @@ import clean_template as ct
 import re
 import time
 from tqdm import tqdm
-from get_file_names import get_file_names
+from get_file_names import get_file_names, read_extraction_file, EXTRACTION_EXTENSIONS
 
 # Statistiques
 nb_sent = 0
@@ -228,7 +228,7 @@ def clean_column(column: pl.Series, is_X=False, clean_templates=True, probabilit
 
 def clean_file(file_path: str, clean_templates=True, probability=0.0012) -> pl.DataFrame:
     """
-    Takes one file from the extraction and cleans it up.
+    Takes one file from the extraction (csv or parquet) and cleans it up.
     """
     if not os.path.exists(file_path):
         logging.warning("File %s doesnt exist", file_path)
@@ -236,7 +236,7 @@ def clean_file(file_path: str, clean_templates=True, probability=0.0012) -> pl.D
     
     global nb_sent
     global nb_cleaned_sent
-    data = pl.read_csv(file_path)
+    data = read_extraction_file(file_path)
 
     # Make sure data is not empty
     if data.is_empty():
@@ -277,7 +277,7 @@ def clean_folder(path: str, dir_name: str, result_path: str):
     c = 0
     result = pl.DataFrame()
     for i in tqdm(range(len(files)), f"Cleaning folder {dir_name}..."):
-        if ".csv" == files[i][-4:]:
+        if files[i].endswith(EXTRACTION_EXTENSIONS):
             data = clean_file(os.path.join(path, files[i]), clean_templates=True)
             if not data.is_empty():
                 result = pl.concat([result, data])
@@ -0,0 +1,75 @@
+"""
+Sentence alignment tools used to find the correction of a sentence in the next revision of a wikipedia page.
+Instead of scoring a sentence against every changed sentence of the new revision like difflib.get_close_matches, the candidates are scored best first: every candidate gets an upper bound of its ratio, the length bound of SequenceMatcher.real_quick_ratio, refined into the character bound of SequenceMatcher.quick_ratio (with the character counts of the index) and then into the ratio itself only when it is the highest bound left.
+The search stops once the highest bound left is lower than the best ratio found, so most candidates are never scored. The cutoff and the tie breaking are the same as difflib.get_close_matches, the candidates are scored with one of the kernels of similarity.py.
+"""
+
+import heapq
+from collections import Counter
+import similarity
+
+
+def build_index(sentences: list[str]) -> dict:
+    """
+    Builds the index of a list of sentences (the candidates of the alignment).
+    Returns a dict with the keys:
+        - sentences: the indexed sentences.
+        - counts: the character counts of every sentence (see get_common_chars).
+    """
+    return {"sentences": sentences, "counts": [Counter(sentence) for sentence in sentences]}
+
+
+def get_common_chars(counts: Counter, other: Counter) -> int:
+    """
+    Returns the number of characters two strings have in common, counting the repeated characters (the size of the intersection of their character multisets, as SequenceMatcher.quick_ratio).
+    Args:
+        - counts, other: the character counts of the strings.
+    """
+    if len(counts) > len(other):
+        counts, other = other, counts
+    return sum(min(n, other.get(char, 0)) for char, n in counts.items())
+
+
+def get_close_matches(word: str, index: dict, cutoff=0.7, kernel="difflib") -> list[str]:
+    """
+    Indexed version of difflib.get_close_matches with n=1. Returns a list with the best "good enough" match of word among the indexed sentences, or an empty list.
+    With the difflib kernel the result is always the same as difflib.get_close_matches (see check_alignment.py): the bounds are never lower than the ratio, and a candidate is only skipped if its bound is strictly lower than the best ratio, so the candidates with the same ratio are all scored for the tie breaking.
+    Args:
+        - word: the sentence for which close matches are desired.
+        - index: the index of the candidate sentences (see build_index).
+        - cutoff: float in the range [0, 1]. Candidates that don't score at least that similar to word are ignored.
+        - kernel: the name of the similarity kernel used to score the candidates (see similarity.py). Its ratio must be 2 * (number of matching characters) / (total length), as the bounds.
+    """
+    sentences = index["sentences"]
+    length = len(word)
+    # Heap of (-bound, refined, candidate id): the length bound first, the character bound once refined.
+    heap = []
+    for i, x in enumerate(sentences):
+        total = length + len(x)
+        bound = 2.0 * min(length, len(x)) / total if total else 1.0
+        if bound >= cutoff:
+            heap.append((-bound, False, i))
+    if not heap:
+        return []
+    heapq.heapify(heap)
+
+    score = similarity.get_scorer(kernel, word, cutoff)
+    counts = Counter(word)
+    best = None
+    while heap and (best is None or -heap[0][0] >= best[0]):
+        _, refined, i = heapq.heappop(heap)
+        x = sentences[i]
+        if not refined:
+            total = length + len(x)
+            bound = 2.0 * get_common_chars(counts, index["counts"][i]) / total if total else 1.0
+            if bound >= cutoff:
+                heapq.heappush(heap, (-bound, True, i))
+            continue
+        ratio = score(x)
+        # Same tie breaking as difflib.get_close_matches.
+        if ratio is not None and (best is None or (ratio, x) > best):
+            best = (ratio, x)
+
+    if best is None:
+        return []
+    return [best[1]]
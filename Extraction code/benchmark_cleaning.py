@@ -0,0 +1,72 @@
+"""
+Micro-benchmark of the markup removal functions of text_processing_tools.py (remove_image_captions, remove_table, remove_double_bracket) and of pre_cleaner on template-dense articles of growing size. Please set up the variables below.
+Every removal used to copy the rest of the article, so the time per construct grew with the size of the article. The time per construct and its growth from one size to the next are reported: a growth close to 1 means a linear cost.
+The results can be saved to a json file to compare two versions of the code.
+"""
+import json
+import logging
+import random
+import time
+import synthetic_dump
+import text_processing_tools as tp
+
+logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO, datefmt="%d %H:%M:%S")
+
+
+# Benchmark settings
+sizes = [100, 1000, 10000] # numbers of blocks (a multi-line template, a table and an image caption with some text) of the articles
+repeat = 3 # The best time of repeat runs is reported for every benchmark.
+seed = 0
+report_path = None # Path of a json file to save the results to. None: not saved.
+
+FUNCTIONS = ["remove_image_captions", "remove_table", "remove_double_bracket", "pre_cleaner"]
+
+
+def make_article(nb_blocks: int, rng: random.Random) -> str:
+    """
+    Returns an infobox-laden article of nb_blocks blocks, each one with a multi-line template, a table and an image caption.
+    """
+    blocks = []
+    for k in range(nb_blocks):
+        sentence = synthetic_dump.make_sentence(rng)
+        blocks.append(
+            "{{Infobox Commune\n| nom = " + rng.choice(synthetic_dump.WORDS) + "\n| population = {{formatnum:" + str(rng.randint(100, 99999)) + "}}\n}}\n"
+            + sentence + " Au {{s|XIX}}, la [[ville]] grandit.\n"
+            + "{| class=\"wikitable\"\n|-\n| 1900 || " + str(k) + "\n|}\n"
+            + f"[[File:Image {k}.jpg|vignette|Le [[château]] de la {sentence.lower()}]]\n"
+        )
+    return "".join(blocks)
+
+
+def best_time(func, text: str, repeat: int) -> float:
+    """
+    Returns the best time of repeat runs of func on text in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    rng = random.Random(seed)
+    # Every function is timed on the same articles.
+    articles = {nb_blocks: make_article(nb_blocks, rng) for nb_blocks in sizes}
+    results = {}
+    for name in FUNCTIONS:
+        results[name] = {}
+        previous = None
+        for nb_blocks in sizes:
+            text = articles[nb_blocks]
+            elapsed = best_time(getattr(tp, name), text, repeat)
+            per_block = elapsed / nb_blocks * 1e6
+            growth = per_block / previous if previous else 1.0
+            previous = per_block
+            results[name][nb_blocks] = {"bytes": len(text.encode("utf-8")), "seconds": elapsed, "µs/block": per_block, "growth": growth}
+            logging.info(f"{name} {nb_blocks} blocks ({len(text) / 2**20:.2f} MB): {elapsed * 1000:.1f} ms, {per_block:.1f} µs/block, x{growth:.2f} per block")
+
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(results, f, indent=1, ensure_ascii=False)
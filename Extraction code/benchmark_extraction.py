@@ -0,0 +1,112 @@
+"""
+Benchmark of the extraction on a synthetic dump (see synthetic_dump.py) or a real one. Please set up the variables below.
+Times pre_cleaner, post_cleaner, extract_page and extract_file (end to end) and reports their throughput in revisions/s and MB/s of wikitext, so that throughput regressions can be caught before launching long extractions.
+The results can be saved to a json file to compare two versions of the code.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import lxml.etree as etree
+import main
+import synthetic_dump
+import text_processing_tools as tp
+
+logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO, datefmt="%d %H:%M:%S")
+
+
+# Dump to benchmark. None: a synthetic dump is generated in a temporary directory.
+file_path = None
+namespace = r"{http://www.mediawiki.org/xml/export-0.10/}"
+
+# Synthetic dump settings (see synthetic_dump.write_dump)
+nb_pages = 100
+min_revisions = 25
+max_revisions = 100
+seed = 0
+
+# Benchmark settings
+repeat = 3 # The best time of repeat runs is reported for every benchmark.
+report_path = None # Path of a json file to save the results to. None: not saved.
+
+
+def get_texts(file_path: str, namespace: str) -> list[str]:
+    """
+    Returns the wikitext of every revision of the desirable pages of the dump.
+    """
+    texts = []
+    for _, page in etree.iterparse(file_path, tag=namespace + "page"):
+        if not tp.check_title(page.findtext(namespace + "title")):
+            for text in page.iterfind(f"{namespace}revision/{namespace}text"):
+                if text.text is not None:
+                    texts.append(text.text)
+        page.clear()
+    return texts
+
+
+def best_time(func, repeat: int) -> float:
+    """
+    Returns the best time of repeat runs of func in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_extract_pages(file_path: str, namespace: str) -> None:
+    for _, page in etree.iterparse(file_path, tag=namespace + "page"):
+        main.extract_page(page, namespace, frozenset(), max_revisions=10**9, min_revisions=0)
+
+
+def run_extract_file(file_path: str, namespace: str, directory: str) -> None:
+    # extract_file deletes the dump once extracted, so a copy is extracted.
+    copy_path = os.path.join(directory, "copy_" + os.path.basename(file_path))
+    save_path = os.path.join(directory, "results")
+    shutil.copy(file_path, copy_path)
+    shutil.rmtree(save_path, ignore_errors=True)
+    os.mkdir(save_path)
+    main.extract_file(copy_path, namespace, frozenset(), save_path, max_revisions=10**9, min_revisions=0, save_interval=None)
+
+
+def report(results: dict, name: str, elapsed: float, nb_revisions: int, nb_bytes: int, unit="revisions") -> None:
+    """
+    Logs and adds to results the throughput of a benchmark.
+    """
+    results[name] = {"seconds": elapsed, f"{unit}/s": nb_revisions / elapsed, "MB/s": nb_bytes / 2**20 / elapsed}
+    logging.info(f"{name}: {elapsed:.2f}s, {nb_revisions / elapsed:.0f} {unit}/s, {nb_bytes / 2**20 / elapsed:.2f} MB/s")
+
+
+if __name__ == "__main__":
+    directory = tempfile.mkdtemp()
+    try:
+        if file_path is None:
+            file_path = os.path.join(directory, "synthetic.xml")
+            logging.info(f"Generating a synthetic dump of {nb_pages} pages")
+            synthetic_dump.write_dump(file_path, nb_pages, min_revisions, max_revisions, seed=seed)
+        logging.getLogger().setLevel(logging.INFO) # Hides the debug messages of the saves.
+        main.status_interval = float("inf") # No status file of the worker (see main.file_status_update) in the working directory.
+        file_size = os.path.getsize(file_path)
+
+        texts = get_texts(file_path, namespace)
+        nb_bytes = sum(len(text.encode("utf-8")) for text in texts)
+        cleaned = [tp.pre_cleaner(text) for text in texts]
+        sentences = [sentence for text in cleaned for sentence in tp.split_text(text)]
+        nb_sentence_bytes = sum(len(sentence.encode("utf-8")) for sentence in sentences)
+        logging.info(f"{len(texts)} revisions, {nb_bytes / 2**20:.1f} MB of wikitext, {len(sentences)} sentences, dump of {file_size / 2**20:.1f} MB")
+
+        results = {"revisions": len(texts), "wikitext_bytes": nb_bytes, "dump_bytes": file_size}
+        report(results, "pre_cleaner", best_time(lambda: [tp.pre_cleaner(text) for text in texts], repeat), len(texts), nb_bytes)
+        report(results, "post_cleaner", best_time(lambda: [tp.post_cleaner(sentence) for sentence in sentences], repeat), len(sentences), nb_sentence_bytes, unit="sentences")
+        report(results, "extract_page", best_time(lambda: run_extract_pages(file_path, namespace), repeat), len(texts), nb_bytes)
+        report(results, "extract_file", best_time(lambda: run_extract_file(file_path, namespace, directory), repeat), len(texts), file_size)
+
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(results, f, indent=1)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,71 @@
+"""
+Benchmark of the incremental pre cleaning (main.incremental_cleaning) against pre_cleaner on long articles where every revision edits one paragraph. Please set up the variables below.
+The revisions are made like in synthetic_dump.py: an infobox, nb_paragraphs paragraphs with templates, references, image captions and tables, and the footer sections. Every revision rewrites a sentence of one paragraph.
+The time per revision of both functions, the speedup and the number of blocks of the last revision (see tp.split_blocks) are reported. The outputs are checked to be the same.
+The results can be saved to a json file to compare two versions of the code.
+"""
+import json
+import logging
+import random
+import time
+import synthetic_dump
+import text_processing_tools as tp
+
+logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO, datefmt="%d %H:%M:%S")
+
+
+# Benchmark settings
+sizes = [30, 300, 1000] # numbers of paragraphs of the articles
+nb_revisions = 30
+repeat = 3 # The best time of repeat runs is reported for every benchmark.
+seed = 0
+report_path = None # Path of a json file to save the results to. None: not saved.
+
+
+def make_revisions(nb_paragraphs: int, nb_revisions: int, rng: random.Random) -> list[str]:
+    """
+    Returns nb_revisions revisions of an article of nb_paragraphs paragraphs, every revision rewriting a sentence of one paragraph of the previous one.
+    """
+    blocks = synthetic_dump.make_text(rng, nb_paragraphs)
+    revisions = ["\n\n".join(blocks)]
+    while len(revisions) < nb_revisions:
+        blocks = synthetic_dump.edit(blocks, "rewrite", rng)
+        revisions.append("\n\n".join(blocks))
+    return revisions
+
+
+def best_time(revisions: list[str], incremental: bool, repeat: int) -> tuple:
+    """
+    Returns the best time of repeat runs of the cleaning of all the revisions in seconds, and the cleaned revisions.
+    """
+    times = []
+    for _ in range(repeat):
+        cache = {}
+        start = time.perf_counter()
+        if incremental:
+            cleaned = [tp.pre_cleaner_incremental(text, cache) for text in revisions]
+        else:
+            cleaned = [tp.pre_cleaner(text) for text in revisions]
+        times.append(time.perf_counter() - start)
+    return min(times), cleaned
+
+
+if __name__ == "__main__":
+    rng = random.Random(seed)
+    results = {}
+    for nb_paragraphs in sizes:
+        revisions = make_revisions(nb_paragraphs, nb_revisions, rng)
+        elapsed, cleaned = best_time(revisions, False, repeat)
+        incremental_elapsed, incremental_cleaned = best_time(revisions, True, repeat)
+        if cleaned != incremental_cleaned:
+            logging.error(f"{nb_paragraphs} paragraphs: pre_cleaner_incremental doesn't give the same output as pre_cleaner")
+        nb_blocks = len(tp.split_blocks(revisions[-1]))
+        speedup = elapsed / incremental_elapsed
+        results[nb_paragraphs] = {"bytes": len(revisions[-1].encode("utf-8")), "blocks": nb_blocks, "pre_cleaner ms/revision": elapsed / nb_revisions * 1000,
+                                  "pre_cleaner_incremental ms/revision": incremental_elapsed / nb_revisions * 1000, "speedup": speedup}
+        logging.info(f"{nb_paragraphs} paragraphs ({len(revisions[-1]) / 2**10:.0f} KB, {nb_blocks} blocks): pre_cleaner {elapsed / nb_revisions * 1000:.2f} ms/revision, "
+                     f"pre_cleaner_incremental {incremental_elapsed / nb_revisions * 1000:.2f} ms/revision, x{speedup:.1f}")
+
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(results, f, indent=1, ensure_ascii=False)
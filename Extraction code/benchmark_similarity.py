@@ -0,0 +1,75 @@
+"""
+Benchmark of the similarity kernels (similarity.py) on real wikipedia revisions. Please set up the variables below.
+The changed sentences of consecutive revisions of the first pages of a dump are aligned with difflib.get_close_matches (the baseline) and with every kernel. Reports the throughput of each kernel and its agreement with the baseline (same match, or no match for both).
+"""
+from difflib import get_close_matches
+import logging
+import time
+import lxml.etree as etree
+import alignment
+import text_processing_tools as tp
+
+logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO, datefmt="%d %H:%M:%S")
+
+
+# Important to modify
+file_path = r"please set up path/frwiki-20230101-pages-meta-history1.xml-p1p1000"
+namespace = r"{http://www.mediawiki.org/xml/export-0.10/}"
+
+# Benchmark settings
+max_pages = 20
+cutoff_rate = 0.7
+kernels = ["difflib", "lcs"]
+
+
+def get_revision_pairs(file_path: str, namespace: str, max_pages: int) -> list[tuple[list[str], list[str]]]:
+    """
+    Returns the (old_revision_sents, new_revision_sents) changed sentences of every pair of consecutive revisions of the first max_pages desirable pages of the dump.
+    """
+    pairs = []
+    pages = 0
+    for _, page in etree.iterparse(file_path, tag=namespace + "page"):
+        if pages >= max_pages:
+            break
+        title = page.findtext(namespace + "title")
+        if title is None or tp.check_title(title):
+            page.clear()
+            continue
+        old_revision = None
+        for rev in page.iterfind(namespace + "revision"):
+            text = rev.findtext(namespace + "text")
+            if text is None:
+                continue
+            new_revision = tp.split_text(tp.pre_cleaner(text))
+            if old_revision is not None:
+                new_revision_sents, old_revision_sents = tp.filter_direct_matches(new_revision, old_revision)
+                if old_revision_sents and new_revision_sents:
+                    pairs.append((old_revision_sents, new_revision_sents))
+            old_revision = new_revision
+        page.clear()
+        pages += 1
+    return pairs
+
+
+if __name__ == "__main__":
+    logging.info(f"Loading revisions from {file_path}")
+    pairs = get_revision_pairs(file_path, namespace, max_pages)
+    nb_sentences = sum(len(old) for old, _ in pairs)
+    nb_comparisons = sum(len(old) * len(new) for old, new in pairs)
+    logging.info(f"{len(pairs)} revision pairs, {nb_sentences} sentences to align, {nb_comparisons} sentence comparisons.")
+
+    start = time.time()
+    baseline = [get_close_matches(sentence, new, n=1, cutoff=cutoff_rate) for old, new in pairs for sentence in old]
+    elapsed = time.time() - start
+    logging.info(f"difflib.get_close_matches (baseline): {elapsed:.2f}s, {nb_comparisons / elapsed:.0f} comparisons/s")
+
+    for kernel in kernels:
+        start = time.time()
+        results = []
+        for old, new in pairs:
+            index = alignment.build_index(new)
+            for sentence in old:
+                results.append(alignment.get_close_matches(sentence, index, cutoff=cutoff_rate, kernel=kernel))
+        elapsed = time.time() - start
+        agreement = sum(a == b for a, b in zip(baseline, results)) / max(len(baseline), 1)
+        logging.info(f"Kernel {kernel}: {elapsed:.2f}s, {nb_comparisons / elapsed:.0f} comparisons/s, agreement with the baseline: {agreement:.2%}")
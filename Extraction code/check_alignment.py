@@ -0,0 +1,118 @@
+"""
+Golden check of the indexed alignment (alignment.get_close_matches, see main.indexed_alignment) against difflib.get_close_matches on a fixture of revision pairs. Please set up the variables below.
+Every revision pair of the fixture has the changed sentences of the old and of the new revision (see tp.filter_direct_matches). Every old sentence is aligned with difflib.get_close_matches and with the indexed alignment, the matches must be the same. Exits with status 1 if they aren't.
+The time of both alignments is reported.
+The fixture is generated from a synthetic dump (see synthetic_dump.py) if fixture_path doesn't exist, with revision pairs where a sentence is rewritten several times (see make_rewrites) so that the candidates are close to each other.
+"""
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from difflib import get_close_matches
+import lxml.etree as etree
+import alignment
+import synthetic_dump
+import text_processing_tools as tp
+
+logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO, datefmt="%d %H:%M:%S")
+
+
+fixture_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alignment_fixture.json")
+cutoff = 0.7
+
+# Fixture settings
+nb_pairs = 40
+nb_pages = 20
+gap = 8 # The revision pairs are made of revisions gap revisions apart, so that more sentences change between them.
+nb_rewrites = 40 # Number of revision pairs with rewritten sentences.
+seed = 2
+namespace = r"{http://www.mediawiki.org/xml/export-0.10/}"
+
+
+def make_fixture(file_path: str, namespace: str, nb_pairs: int, gap: int) -> list[dict]:
+    """
+    Returns up to nb_pairs revision pairs of the dump as {"old": changed sentences of the old revision, "new": changed sentences of the new revision}, keeping the pairs with at least two candidates.
+    """
+    pairs = []
+    for _, page in etree.iterparse(file_path, tag=namespace + "page"):
+        if not tp.check_title(page.findtext(namespace + "title")):
+            revisions = [tp.split_text(tp.pre_cleaner(text.text or "")) for text in page.iterfind(f"{namespace}revision/{namespace}text")]
+            for k in range(0, len(revisions) - gap, gap):
+                new, old = tp.filter_direct_matches(revisions[k + gap], revisions[k])
+                if old and len(new) >= 2 and len(pairs) < nb_pairs:
+                    pairs.append({"old": old, "new": new})
+        page.clear()
+    return pairs
+
+
+def make_rewrites(nb_pairs: int, rng: random.Random) -> list[dict]:
+    """
+    Returns nb_pairs revision pairs where the old sentence is rewritten into several candidates: words swapped, moved, replaced or dropped. These candidates have close ratios and the same characters, so the bounds of the indexed alignment rarely rule them out and the tie breaking is checked.
+    """
+    pairs = []
+    for _ in range(nb_pairs):
+        words = synthetic_dump.make_sentence(rng).split()
+        candidates = []
+        for _ in range(rng.randint(3, 8)):
+            variant = list(words)
+            for _ in range(rng.randint(1, 3)):
+                i, j = rng.randrange(len(variant)), rng.randrange(len(variant))
+                edit = rng.choice(["swap", "move", "replace", "drop"])
+                if edit == "swap":
+                    variant[i], variant[j] = variant[j], variant[i]
+                elif edit == "move":
+                    variant.insert(j, variant.pop(i))
+                elif edit == "replace":
+                    variant[i] = rng.choice(synthetic_dump.WORDS)
+                elif len(variant) > 3:
+                    variant.pop(i)
+            candidates.append("! " + " ".join(variant) + "\n")
+        pairs.append({"old": ["! " + " ".join(words) + "\n"], "new": candidates})
+    return pairs
+
+
+def compare(pairs: list[dict]) -> tuple:
+    """
+    Returns the number of old sentences of the fixture, the number of them whose match differs from difflib.get_close_matches, and the time of difflib.get_close_matches and of the indexed alignment (index included) in seconds.
+    """
+    start = time.perf_counter()
+    expected = [get_close_matches(sentence, pair["new"], n=1, cutoff=cutoff) for pair in pairs for sentence in pair["old"]]
+    difflib_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matches = []
+    for pair in pairs:
+        index = alignment.build_index(pair["new"])
+        matches.extend(alignment.get_close_matches(sentence, index, cutoff=cutoff) for sentence in pair["old"])
+    indexed_time = time.perf_counter() - start
+
+    mismatches = sum(match != expected_match for match, expected_match in zip(matches, expected))
+    return len(expected), mismatches, difflib_time, indexed_time
+
+
+if __name__ == "__main__":
+    if not os.path.exists(fixture_path):
+        directory = tempfile.mkdtemp()
+        try:
+            dump_path = os.path.join(directory, "synthetic.xml")
+            synthetic_dump.write_dump(dump_path, nb_pages, seed=seed)
+            fixture = make_fixture(dump_path, namespace, nb_pairs, gap) + make_rewrites(nb_rewrites, random.Random(seed))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        with open(fixture_path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, indent=0, ensure_ascii=False)
+        logging.info(f"Wrote a fixture of {len(fixture)} revision pairs to {fixture_path}")
+    with open(fixture_path, encoding="utf-8") as f:
+        pairs = json.load(f)
+
+    nb_sentences, mismatches, difflib_time, indexed_time = compare(pairs)
+    logging.info(f"{mismatches} of {nb_sentences} matches differ from difflib.get_close_matches")
+    logging.info(f"difflib.get_close_matches: {difflib_time:.3f}s, indexed alignment: {indexed_time:.3f}s")
+
+    if mismatches:
+        logging.error("The indexed alignment doesn't give the same matches as difflib.get_close_matches")
+        sys.exit(1)
@@ -0,0 +1,79 @@
+"""
+Equivalence check of the incremental pre cleaning (main.incremental_cleaning) on a synthetic dump (see synthetic_dump.py) or a real one. Please set up the variables below.
+Every revision is cleaned with pre_cleaner and with pre_cleaner_incremental (one cache per page, revisions in order), and the pages are extracted with and without incremental_cleaning: the cleaned texts and the X, y pairs must be the same.
+Exits with status 1 if they aren't.
+"""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import lxml.etree as etree
+import main
+import synthetic_dump
+import text_processing_tools as tp
+
+logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO, datefmt="%d %H:%M:%S")
+
+
+# Dump to check. None: a synthetic dump is generated in a temporary directory.
+file_path = None
+namespace = r"{http://www.mediawiki.org/xml/export-0.10/}"
+
+# Synthetic dump settings (see synthetic_dump.write_dump)
+nb_pages = 40
+seed = 1
+
+
+def check_texts(file_path: str, namespace: str) -> tuple[int]:
+    """
+    Returns the number of revisions of the dump and the number of them cleaned differently by pre_cleaner_incremental.
+    """
+    nb_revisions = mismatches = 0
+    for _, page in etree.iterparse(file_path, tag=namespace + "page"):
+        cache = {}
+        for text in page.iterfind(f"{namespace}revision/{namespace}text"):
+            if text.text is None:
+                continue
+            nb_revisions += 1
+            if tp.pre_cleaner_incremental(text.text, cache) != tp.pre_cleaner(text.text):
+                mismatches += 1
+                if mismatches <= 5:
+                    logging.warning(f"Revision cleaned differently in page {page.findtext(namespace + 'title')}")
+        page.clear()
+    return nb_revisions, mismatches
+
+
+def get_pairs(file_path: str, namespace: str, incremental: bool) -> list[tuple]:
+    """
+    Returns the X, y pairs of every page of the dump, extracted with or without incremental_cleaning.
+    """
+    main.incremental_cleaning = incremental
+    pairs = []
+    for _, page in etree.iterparse(file_path, tag=namespace + "page"):
+        X, y = main.extract_revisions(page.findall(namespace + "revision"), page.findtext(namespace + "title"), namespace)[:2]
+        pairs.extend(zip(X, y))
+        page.clear()
+    return pairs
+
+
+if __name__ == "__main__":
+    directory = tempfile.mkdtemp()
+    try:
+        if file_path is None:
+            file_path = os.path.join(directory, "synthetic.xml")
+            logging.info(f"Generating a synthetic dump of {nb_pages} pages")
+            synthetic_dump.write_dump(file_path, nb_pages, seed=seed)
+
+        nb_revisions, mismatches = check_texts(file_path, namespace)
+        logging.info(f"pre_cleaner_incremental: {mismatches} of {nb_revisions} revisions cleaned differently")
+        pairs = get_pairs(file_path, namespace, False)
+        incremental_pairs = get_pairs(file_path, namespace, True)
+        logging.info(f"extract_revisions: {len(pairs)} pairs, {len(incremental_pairs)} pairs with incremental_cleaning")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if mismatches or pairs != incremental_pairs:
+        logging.error("The incremental cleaning doesn't give the same results")
+        sys.exit(1)
+    logging.info("Same results")
@@ -0,0 +1,122 @@
+"""
+Offset based checkpoints of an extraction.
+Every time a worker saves its results, it writes a small json manifest with the byte offset of the last page it has saved. A resumed extraction opens the dump directly at that offset (see sharding.ShardReader) instead of parsing it again from the beginning.
+Only plain .xml dumps (or shards of them) can be resumed from an offset.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+import sharding
+
+
+def get_checkpoint_path(save_path: str, checkpoint_id: str) -> str:
+    """
+    Returns the path of the manifest of checkpoint_id (usually the name of the dump file or the id of the shard).
+    """
+    return os.path.join(save_path, f"checkpoint_{checkpoint_id}.json")
+
+
+def load_checkpoint(save_path: str, checkpoint_id: str):
+    """
+    Returns the content of the manifest of checkpoint_id, or None if there is no checkpoint.
+    """
+    path = get_checkpoint_path(save_path, checkpoint_id)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(save_path: str, checkpoint_id: str, file_path: str, offset: int, saves: int) -> None:
+    """
+    Writes the manifest of checkpoint_id: the dump file_path has been extracted and saved up to (and including) the page starting at offset, and saves files of results have been written.
+    The manifest is replaced atomically so that a crash never leaves a partial manifest.
+    """
+    path = get_checkpoint_path(save_path, checkpoint_id)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"file_path": os.path.basename(file_path), "offset": offset, "saves": saves}, f)
+    os.replace(path + ".tmp", path)
+
+
+def remove_checkpoint(save_path: str, checkpoint_id: str) -> None:
+    """
+    Removes the manifest of checkpoint_id once the extraction is complete.
+    """
+    path = get_checkpoint_path(save_path, checkpoint_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class OffsetReader:
+    """
+    Binary file object recording the byte offsets of the <page> tags it reads, in order. Since the pages are parsed in order, the offset of the page being processed is the first recorded offset (see pop).
+    Args:
+        - file: the binary file object to read.
+        - file_path: the path of the dump file.
+        - shift: added to the positions in file to get the offsets in the dump file (the header added by a ShardReader isn't in the file).
+    """
+
+    def __init__(self, file, file_path: str, shift=0):
+        self.file = file
+        self.file_path = file_path
+        self.size = getattr(file, "size", None) # Number of bytes to read, if known.
+        self.position = shift
+        self.offsets = deque()
+        self.tail = b""
+
+    def read(self, size=-1) -> bytes:
+        data = self.file.read(size)
+        # The tail of the previous read is too short to hold a whole tag, so a tag is never recorded twice.
+        buffer = self.tail + data
+        i = buffer.find(sharding.PAGE_TAG)
+        while i != -1:
+            self.offsets.append(self.position - len(self.tail) + i)
+            i = buffer.find(sharding.PAGE_TAG, i + 1)
+        self.tail = buffer[-(len(sharding.PAGE_TAG) - 1):]
+        self.position += len(data)
+        return data
+
+    def pop(self) -> int:
+        """
+        Returns the offset of the next page that hasn't been popped yet.
+        """
+        return self.offsets.popleft()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def open_source(file_path: str, save_path: str, checkpoint_id: str, start=None, end=None, header_end=None):
+    """
+    Opens a plain .xml wikipedia dump, or a shard of it, for an extraction with checkpoints. If there is a checkpoint for checkpoint_id, the dump is opened directly at the last saved page.
+    Args:
+        - file_path: complete path to the wikipedia dump .xml file.
+        - save_path: the directory of the results (and of the checkpoints).
+        - checkpoint_id: id of the checkpoint (see get_checkpoint_path).
+        - start, end, header_end: the byte range of the shard and the offset of the first page of the dump (see sharding.get_shards). The whole dump if None.
+    Returns a tuple (reader, skip_pages, saves): the OffsetReader to extract, the number of pages to skip at the beginning (the last saved page) and the number of files of results already saved.
+    """
+    if header_end is None or end is None:
+        with open(file_path, "rb") as f:
+            if end is None:
+                end = sharding.find_end(f)
+            if header_end is None:
+                header_end = sharding.find_next_page(f, 0)
+                if header_end == -1: # No pages in the dump.
+                    header_end = end
+    if start is None:
+        start = header_end
+
+    skip_pages = 0
+    saves = 0
+    checkpoint = load_checkpoint(save_path, checkpoint_id)
+    if checkpoint and checkpoint["file_path"] == os.path.basename(file_path):
+        start = checkpoint["offset"]
+        skip_pages = 1
+        saves = checkpoint["saves"]
+        logging.info(f"Resuming {checkpoint_id} from byte {start} of {file_path}")
+
+    reader = OffsetReader(sharding.ShardReader(file_path, start, end, header_end), file_path, start - header_end)
+    return reader, skip_pages, saves
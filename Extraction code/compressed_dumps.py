@@ -0,0 +1,130 @@
+"""
+Tools to read compressed wikipedia dumps (.bz2 and .7z) directly, without decompressing them to disk first.
+The .bz2 dumps made of multiple independent bz2 streams (multistream dumps) can be decompressed in parallel: the streams are located by their header and decompressed by a pool of threads (bz2 releases the GIL while decompressing), in order.
+Reading .7z dumps requires the optional libarchive-c package.
+"""
+
+import bz2
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import io
+import logging
+import mmap
+import os
+import re
+
+try:
+    import libarchive
+except ImportError:
+    libarchive = None
+
+# Header of a bz2 stream: "BZh", the block size and the magic number of the first block.
+STREAM_HEADER = re.compile(rb"BZh[1-9]1AY&SY")
+MAX_STREAM_SIZE = 64 << 20 # 64 MB: dumps with bigger streams are decompressed sequentially.
+COMPRESSED_EXTENSIONS = (".bz2", ".7z")
+
+
+def is_compressed(file_path: str) -> bool:
+    """
+    Checks if file_path is a compressed wikipedia dump that can be read with open_dump.
+    """
+    return file_path.endswith(COMPRESSED_EXTENSIONS)
+
+
+def find_streams(file_path: str) -> list[int]:
+    """
+    Returns the offsets of the bz2 streams of a .bz2 file. A single offset (0) means that the file isn't a multistream file.
+    """
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return [match.start() for match in STREAM_HEADER.finditer(data)]
+
+
+def decompress_streams(data: bytes) -> bytes:
+    """
+    Decompresses the data of one or more consecutive complete bz2 streams.
+    """
+    result = []
+    while data:
+        decompressor = bz2.BZ2Decompressor()
+        result.append(decompressor.decompress(data))
+        if not decompressor.eof:
+            raise EOFError("Compressed stream ended before the end-of-stream marker was reached")
+        data = decompressor.unused_data
+    return b"".join(result)
+
+
+def _iter_bz2_streams(file_path: str, offsets: list[int], threads: int):
+    """
+    Yields the decompressed data of the streams of a multistream .bz2 file, in order. At most 2*threads streams are read ahead.
+    """
+    with open(file_path, "rb") as f, ThreadPoolExecutor(threads) as executor:
+        size = f.seek(0, io.SEEK_END)
+        futures = deque()
+        for start, end in zip(offsets, offsets[1:] + [size]):
+            f.seek(start)
+            futures.append(executor.submit(decompress_streams, f.read(end - start)))
+            if len(futures) >= 2 * threads:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def _iter_7z(file_path: str):
+    """
+    Yields the decompressed blocks of the (first) file of a .7z archive.
+    """
+    with libarchive.file_reader(file_path) as archive:
+        for entry in archive:
+            for block in entry.get_blocks():
+                yield block
+            return
+
+
+class BlocksReader(io.RawIOBase):
+    """
+    Read only binary file object reading the blocks of bytes yielded by a generator.
+    """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self.buffer:
+            try:
+                self.buffer = next(self.blocks)
+            except StopIteration:
+                return 0
+        size = min(len(b), len(self.buffer))
+        b[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+    def close(self) -> None:
+        self.blocks.close()
+        super().close()
+
+
+def open_dump(file_path: str, threads=1):
+    """
+    Opens a compressed wikipedia dump (.bz2 or .7z) and returns a binary file object reading the decompressed xml. Can be given to lxml.etree.iterparse in place of a file path.
+    Args:
+        - file_path: complete path to the compressed dump.
+        - threads: the number of threads decompressing the streams of a multistream .bz2 dump. Single stream dumps are always decompressed sequentially.
+    """
+    if file_path.endswith(".7z"):
+        if libarchive is None:
+            raise ImportError("Reading .7z dumps requires the libarchive-c package (pip install libarchive-c).")
+        return io.BufferedReader(BlocksReader(_iter_7z(file_path)))
+
+    if threads > 1:
+        offsets = find_streams(file_path)
+        ends = offsets[1:] + [os.path.getsize(file_path)]
+        if len(offsets) > 1 and offsets[0] == 0 and max(b - a for a, b in zip(offsets, ends)) <= MAX_STREAM_SIZE:
+            logging.debug(f"Decompressing the {len(offsets)} streams of {file_path} with {threads} threads")
+            return io.BufferedReader(BlocksReader(_iter_bz2_streams(file_path, offsets, threads)))
+    return bz2.open(file_path, "rb")
@@ -0,0 +1,94 @@
+"""
+Deduplication of the extracted X, y pairs before they are saved (main.dedup_pairs).
+The same pairs are extracted from different revisions of a page (reverts, edit wars) and from different pages and workers. The duplicates of a page are dropped with a set of its pairs (see main.extract_revisions), the duplicates across pages and workers with a bloom filter.
+The bloom filter of a pool is in shared memory (multiprocessing.shared_memory) so that all the workers use the same one. The pipeline writer has its own (see pipeline.writer).
+A bloom filter has no false negatives but can have false positives: a few unique pairs are dropped if the filter is too small for the number of pairs (about 3 in a million with 7 hashes and 40 bits per pair).
+The workers set the bits without locks, so two workers extracting the same pair at the same time can both keep it.
+"""
+
+import hashlib
+from multiprocessing import shared_memory
+
+NB_HASHES = 7
+
+
+def get_key(x: str, y: str) -> bytes:
+    return (x + "\0" + y).encode("utf-8", "surrogatepass")
+
+
+class BloomFilter:
+    """
+    Bloom filter of the X, y pairs. Can be sent to the processes of a pool (e.g. as an argument of the pool initializer): the processes use the same shared memory.
+    Args:
+        - nb_bits: the size of the filter in bits.
+        - nb_hashes: the number of bits set for every pair.
+        - name: the name of the shared memory block to use. None: the filter is in the memory of the process unless shared.
+        - shared: creates a new shared memory block, which must be released with unlink once the extraction is done.
+    """
+
+    def __init__(self, nb_bits: int, nb_hashes=NB_HASHES, name=None, shared=False):
+        self.nb_bits = nb_bits
+        self.nb_hashes = nb_hashes
+        self.memory = None
+        if shared or name is not None:
+            self.memory = shared_memory.SharedMemory(name=name, create=shared, size=(nb_bits + 7) // 8)
+            self.name = self.memory.name
+            self.bits = self.memory.buf
+        else:
+            self.name = None
+            self.bits = bytearray((nb_bits + 7) // 8)
+
+    def __reduce__(self):
+        if self.name is None:
+            raise TypeError("only a bloom filter in shared memory can be sent to another process")
+        return BloomFilter, (self.nb_bits, self.nb_hashes, self.name)
+
+    def add(self, key: bytes) -> bool:
+        """
+        Adds key to the filter. Returns True if key was (probably) already in the filter.
+        """
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        # Double hashing: the i-th bit of the key is h1 + i * h2.
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        present = True
+        for i in range(self.nb_hashes):
+            bit = (h1 + i * h2) % self.nb_bits
+            mask = 1 << (bit & 7)
+            if not bits[bit >> 3] & mask:
+                present = False
+                bits[bit >> 3] |= mask
+        return present
+
+    def close(self) -> None:
+        if self.memory is not None:
+            self.bits = None
+            self.memory.close()
+
+    def unlink(self) -> None:
+        """
+        Releases the shared memory block (once all the processes are done with it).
+        """
+        if self.memory is not None:
+            self.memory.unlink()
+
+
+def drop_duplicates(X: list[str], y: list[str], titles: list[str], timestamps: list[str], comments: list[str], seen=None, bloom=None) -> tuple[list[str]]:
+    """
+    Returns the X, y, titles, timestamps, comments lists without the rows whose X, y pair is in seen (a set) or in bloom (a BloomFilter), in the same order. The pairs kept are added to seen and bloom.
+    The lists are returned unchanged if there is no duplicate.
+    """
+    keep = []
+    for i in range(len(X)):
+        pair = (X[i], y[i])
+        if seen is not None:
+            if pair in seen:
+                continue
+            seen.add(pair)
+        if bloom is not None and bloom.add(get_key(*pair)):
+            continue
+        keep.append(i)
+    if len(keep) == len(X):
+        return X, y, titles, timestamps, comments
+    return tuple([column[i] for i in keep] for column in (X, y, titles, timestamps, comments))
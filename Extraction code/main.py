@@ -1,12 +1,20 @@
+import difflib
 from difflib import get_close_matches
 import os
 import re
-from multiprocessing import pool, cpu_count
+import sys
+from multiprocessing import pool, cpu_count, Queue
 import time
 import lxml.etree as etree
 import pandas as pd
 import logging
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 # Setup logging settings
 logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.DEBUG, datefmt="%d %H:%M:%S")
 
@@ -15,15 +23,95 @@ logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logg
 start = time.time()
 pages_extracted = 0
 total_revisions = 0
+last_status_update = 0 # Time of the last write of the status file of the worker (file_status_update).
+status_interval = 10 # in seconds: minimum time between two writes of the status file of a worker.
+skipped_revisions = 0 # Revisions identical to a recent revision of their page (see skip_reverts).
 cutoff_rate = 0.7
 
+# Extraction modes
+stream_revisions = False # Streams the revisions of the pages one by one instead of building the whole page in memory (bounded memory per worker).
+incremental_cleaning = False # Only pre cleans the blocks of a revision that changed since the previous revision of the page.
+indexed_alignment = False # Scores the changed sentences best first by an upper bound of their similarity and stops once no candidate can beat the best match (see alignment.py). Same results as difflib.get_close_matches (see check_alignment.py).
+paragraph_diff = False # Compares consecutive revisions paragraph by paragraph first and only splits the changed paragraphs into sentences.
+hashed_diff = False # Gets the changed sentences of two revisions by hashing them instead of generating and parsing a context_diff.
+similarity_kernel = "difflib" # Kernel scoring the alignment candidates: "difflib" (SequenceMatcher.ratio) or "lcs" (bit-parallel LCS ratio with early exit), see similarity.py.
+decompress_threads = 1 # Number of threads decompressing the streams of multistream .bz2 dumps (see compressed_dumps.py).
+output_format = "csv" # Format of the saved results: "csv" or "parquet" (zstd compressed, dictionary encoded title and comments, requires pyarrow).
+skip_reverts = False # Skips the revisions whose sha1 is the same as a recent revision of the page (no change or revert) and drops the pairs of the reverted revisions.
+revert_window = 10 # Number of previous revisions of a page compared with every revision (skip_reverts).
+# Revision pair pre-filters: the pairs of revisions matching a filter aren't aligned (and the new revision is only cleaned if the next pair is aligned). The dropped pairs are counted in pair_filter_counts.
+max_bytes_delta = None # in bytes: drops the pairs whose text sizes (<text bytes=...>) differ by more than max_bytes_delta. None: no limit.
+skip_minor = False # Drops the pairs whose new revision is marked as minor (<minor/>).
+skip_bots = False # Drops the pairs whose new revision was made by a bot (username matching BOT_USERNAME).
+comment_keywords = () # e.g. ("révoqu", "annul", "revert", "vandal"): drops the pairs whose comment contains one of the keywords (lowercase).
+BOT_USERNAME = re.compile(r"bot\b", re.IGNORECASE)
+pair_filter_counts = {"bytes_delta": 0, "minor": 0, "bot": 0, "comment": 0}
+page_namespaces = None # e.g. {"0"} (articles): only extracts the pages whose <ns> is in page_namespaces instead of checking their title with tp.check_title. None: title check only.
+page_ids = None # e.g. range(1, 500000): only extracts the pages whose <id> is in page_ids. None: every page id.
+# Per-page budgets (see watchdog.py): the pages exceeding them are aborted and written to the quarantine file of the worker.
+max_page_seconds = None # in seconds: time budget of the extraction of a page. None: no limit.
+max_page_bytes = None # in bytes: size budget of the text of all the revisions of a page. None: no limit.
+retry_quarantined = False # Extracts the quarantined pages of a file (or shard) again without budgets once the rest of it is done, with the worker id '{n}_retry'.
+profile_stages = False # Times the stages of the extraction (pre_cleaner, split_text, alignment...) and writes a json report per worker at every save (see stage_timing.py).
+memo_size = None # e.g. 100_000: number of post_cleaner results and of sentence alignments kept in the LRU caches of every worker (see memo.py). None: no cache.
+dedup_pairs = False # Drops the X, y pairs already extracted from the page (set of the pairs of the page) or from another page by any worker (bloom filter, see dedup.py) before they are saved.
+dedup_bloom_bits = 2**31 # Size of the bloom filter (256 MB, in shared memory when shared by a pool), about 3 false positives (unique pairs dropped) per million pairs up to 50 million pairs.
+dropped_pairs = {"page": 0, "global": 0} # Duplicate pairs dropped by the seen set of their page and by the bloom filter (dedup_pairs).
+use_checkpoints = False # Writes a checkpoint with the offset of the last saved page at every save, a resumed extraction of a plain .xml file starts from there (see checkpoints.py).
+
+# Flush policy: the buffered results of a worker are saved as soon as one of the limits is reached (or save_interval seconds after the last save).
+max_buffer_rows = 100_000 # Number of buffered X, y pairs.
+max_buffer_bytes = 64 * 2**20 # Estimated memory used by the buffered results, in bytes.
+
+# Pages aborted by the watchdog: the entries to write to the quarantine file, and the offsets (plain .xml dumps) or else the ids (compressed dumps) of the pages of the current file (retry_quarantined).
+quarantined = []
+quarantined_offsets = set()
+quarantined_ids = set()
+
+# Titles of the pages saved by a previous extraction (see resume_extraction.py), shared read-only by the workers of a pool (see init_worker).
+resume_titles = frozenset()
+# Bloom filter of the extracted pairs (dedup_pairs): shared by the workers of a pool (see init_worker), or created by the first extraction of the process.
+pair_bloom = None
+
 
 # Processing tools
 import text_processing_tools as tp
+import alignment
+import checkpoints
+import compressed_dumps
+import dedup
+import memo
+import progress
+import sharding
+import stage_timing
+import watchdog
 # titles
 from resume_extraction import get_extracted_titles
 
 
+def init_worker(extracted_titles: frozenset, progress_queue=None, bloom=None) -> None:
+    """
+    Initializer of the extraction pools: sends the set of already extracted titles once to every process instead of once with every file or shard to extract, sets the queue of the progress monitor (see progress.py) and the bloom filter of the extracted pairs shared by the workers (dedup_pairs, see dedup.py).
+    """
+    global resume_titles, pair_bloom
+    resume_titles = extracted_titles
+    progress.set_queue(progress_queue)
+    if bloom is not None:
+        pair_bloom = bloom
+
+
+def enable_stage_timing() -> None:
+    """
+    Wraps the stages of the extraction with timers (see stage_timing.py). Must be called in the worker processes.
+    """
+    for name in ("pre_cleaner", "pre_cleaner_incremental", "split_text", "filter_direct_matches", "filter_changed_sentences", "post_cleaner"):
+        stage_timing.instrument(tp, name)
+    stage_timing.instrument(alignment, "build_index")
+    stage_timing.instrument(alignment, "get_close_matches")
+    stage_timing.instrument(sys.modules[__name__], "get_close_matches") # difflib.get_close_matches
+    stage_timing.instrument(difflib, "get_close_matches") # difflib.get_close_matches called by memo.align
+
+
 def get_time() -> tuple[float]:
     """
     Returns the time that the program has executed since the beginning of it's execution in a tuple of format (hours, minutes, seconds, elapsed), and elapsed is the total time elapsed.
@@ -39,17 +127,27 @@ def get_time() -> tuple[float]:
 def file_status_update(n: int) -> None:
     """
     Keeps a record of some status information for a worker. n is the ID of the worker.
+    The file is written at most once every status_interval seconds.
     """
+    global last_status_update
+    if time.time() - last_status_update < status_interval:
+        return
+    last_status_update = time.time()
     hours, minutes, seconds, elapsed = get_time()
     rate = total_revisions/elapsed
     with open(f"stat_worker_{n}.txt", "w") as f:
-        f.write("Number of pages extracted: {}. \nRevisions extracted: {}.  \nTime elapsed: {}h:{}min:{}s. \nExtraction rate: {}rev/s".format(pages_extracted, total_revisions, int(hours), int(minutes), int(seconds), rate))
+        f.write("Number of pages extracted: {}. \nRevisions extracted: {}.  \nRevisions skipped: {}. \nRevision pairs filtered: {}. \nDuplicate pairs dropped: {}. \nMemo hits and misses: {}. \nTime elapsed: {}h:{}min:{}s. \nExtraction rate: {}rev/s".format(pages_extracted, total_revisions, skipped_revisions, pair_filter_counts, dropped_pairs, memo.get_counts(), int(hours), int(minutes), int(seconds), rate))
 
 
 def save_progress(X: list[str], y: list[str], titles: list[str], timestamps: list[str], comments: list[str], save_path: str, n: int, c: int) -> None:
     """
     Saves the progress of an extraction. Is used in the extract_file function to save at a time interval the extraction progress.
+    The results are saved in csv or parquet format depending on output_format.
     """
+    if output_format == "parquet":
+        _save_parquet(X, y, titles, timestamps, comments, save_path, n, c)
+        return
+
     # Create a DataFrame of the data.
     dataframe = pd.DataFrame([[X[i], y[i], titles[i], timestamps[i], comments[i]] for i in range(len(X))], columns=["X", "y", "title", "timestamps", "comments"])
     path = save_path + "\\" + "results_fromworker_{}_nb_{}.csv".format(n, c)
@@ -59,6 +157,43 @@ def save_progress(X: list[str], y: list[str], titles: list[str], timestamps: lis
     logging.debug(f"Successfully saved results from worker {n} to path {path}")
 
 
+def _save_parquet(X: list[str], y: list[str], titles: list[str], timestamps: list[str], comments: list[str], save_path: str, n: int, c: int) -> None:
+    """
+    Saves the results lists directly as the columns of a parquet file (one row group, zstd compression). The title and comments columns are dictionary encoded since they repeat a lot. Belongs to save_progress.
+    """
+    if pa is None:
+        raise ImportError("Saving the results in parquet format requires the pyarrow package (pip install pyarrow).")
+    table = pa.table({
+        "X": pa.array(X, pa.string()),
+        "y": pa.array(y, pa.string()),
+        "title": pa.array(titles, pa.string()).dictionary_encode(),
+        "timestamps": pa.array(timestamps, pa.string()),
+        "comments": pa.array(comments, pa.string()).dictionary_encode(),
+    })
+    path = save_path + "\\" + "results_fromworker_{}_nb_{}.parquet".format(n, c)
+    if os.path.exists(path):
+        logging.warning(f"\nOverwriting a file with the path {path}\nThe file will be overwritten.")
+    pq.write_table(table, path, compression="zstd", row_group_size=max(len(X), 1))
+    logging.debug(f"Successfully saved results from worker {n} to path {path}")
+
+
+def estimate_size(*columns: list[str]) -> int:
+    """
+    Estimates the memory used by some results lists, in bytes (about 50 bytes per string plus its length).
+    """
+    return sum(len(column) * 50 + sum(len(value) for value in column if value) for column in columns)
+
+
+def should_flush(nb_rows: int, nb_bytes: int, last_save: float, save_interval=None) -> bool:
+    """
+    Flush policy of the extraction: returns True if the buffered results (nb_rows X, y pairs using about nb_bytes bytes) have to be saved.
+    They are saved when they exceed max_buffer_rows or max_buffer_bytes, or when save_interval seconds (if not None) have passed since the last save at time last_save.
+    """
+    if nb_rows >= max_buffer_rows or nb_bytes >= max_buffer_bytes:
+        return True
+    return save_interval is not None and nb_rows > 0 and time.time() - last_save > save_interval
+
+
 def get_info(tag: str, element, namespace=""):
     # Tries to get the text of an attribute of element (tag)
     try:
@@ -70,13 +205,264 @@ def get_info(tag: str, element, namespace=""):
     return r
 
 
+def get_text_bytes(rev, namespace="") -> int:
+    """
+    Returns the size in bytes of the text of a revision given by the bytes attribute of its <text> element, or None if it isn't given.
+    """
+    text = rev.find(namespace + "text")
+    if text is None or text.get("bytes") is None:
+        return None
+    return int(text.get("bytes"))
+
+
+def get_pair_filter(rev, namespace="", old_bytes=None) -> str:
+    """
+    Checks the revision pair pre-filters (see max_bytes_delta, skip_minor, skip_bots and comment_keywords) on the pair of revisions ending with rev, from its metadata only.
+    Returns the name of the first filter dropping the pair, or None if the pair should be aligned.
+    Args:
+        - rev: the new revision of the pair.
+        - old_bytes: the size of the text of the previous revision (see get_text_bytes).
+    """
+    if max_bytes_delta is not None and old_bytes is not None:
+        new_bytes = get_text_bytes(rev, namespace)
+        if new_bytes is not None and abs(new_bytes - old_bytes) > max_bytes_delta:
+            return "bytes_delta"
+    if skip_minor and rev.find(namespace + "minor") is not None:
+        return "minor"
+    if skip_bots:
+        username = rev.findtext(namespace + "contributor/" + namespace + "username")
+        if username and BOT_USERNAME.search(username):
+            return "bot"
+    if comment_keywords:
+        comment = rev.findtext(namespace + "comment")
+        if comment and any(keyword in comment.lower() for keyword in comment_keywords):
+            return "comment"
+    return None
+
+
+def is_desirable(title: str, ns: str, page_id: str, extracted_titles: frozenset) -> bool:
+    """
+    Checks that a page should be extracted from its title, namespace (<ns>) and id (see page_namespaces and page_ids). Only needs the first elements of the page, so it can be checked before its revisions are parsed (see iter_pages).
+    """
+    if page_ids is not None and (page_id is None or int(page_id) not in page_ids):
+        return False
+    if page_namespaces is not None:
+        if ns not in page_namespaces:
+            return False
+    elif tp.check_title(title):
+        return False
+    return not title in extracted_titles
+
+
+def start_watchdog(hard_timeout=False):
+    """
+    Returns a started watchdog.Watchdog with the page budgets (max_page_seconds and max_page_bytes), or None if there are no budgets.
+    """
+    if max_page_seconds is None and max_page_bytes is None:
+        return None
+    page_watchdog = watchdog.Watchdog(max_page_seconds, max_page_bytes, hard_timeout)
+    page_watchdog.start()
+    return page_watchdog
+
+
+def quarantine_page(title: str, page_id: str, reason: str) -> None:
+    """
+    Records a page aborted by the watchdog (see extract_source for the quarantine file).
+    """
+    logging.warning(f"Page {title} (id {page_id}) aborted: {reason}")
+    quarantined.append({"title": title, "id": page_id, "reason": reason})
+
+
+def extract_revisions(revisions, title: str, namespace="", page_watchdog=None):
+    """
+    Gets all the X, y pairs from the revisions of a wikipedia page. Only the sentences of the previous revision are kept in memory, every revision is cleared once it has been processed.
+    If skip_reverts, a revision with the same sha1 as one of the revert_window previous revisions isn't cleaned nor aligned: the page is back to that revision, so the pairs of the revisions in between (usually vandalism and its revert) are dropped.
+    The pairs of revisions dropped by the pre-filters (see get_pair_filter) aren't aligned, their new revision is only cleaned if it's needed by the next pair.
+    Args:
+        - revisions: an iterable of xml revision objects parsed with lxml.etree (a list or a generator streaming the revisions).
+        - title: the title of the page the revisions belong to.
+        - namespace: the potential namespace of the page.
+        - page_watchdog: the watchdog.Watchdog checked before every revision (see start_watchdog), raises watchdog.PageBudgetExceeded if the page exceeds its budget. None: no budget.
+    Returns the X, y, titles, timestamps, comments results lists and the number of revisions of the page.
+    """
+    # The results lists.
+    y = []
+    X = []
+    titles = []
+    timestamps = []
+    comments = []
+
+    failed = False
+    first_page = True
+    nb_revisions = 0
+    clean_cache = {} # Cleaned blocks of the previous revision (incremental_cleaning).
+    history = {} # sha1 -> (number of pairs, sentences) of the last revert_window revisions (skip_reverts).
+    pending_text = None # Text of the previous revision if it hasn't been cleaned yet (pre-filters).
+    old_bytes = None # Size of the text of the previous revision (max_bytes_delta).
+    global skipped_revisions
+    if memo_size:
+        memo.enable(memo_size)
+        post_cleaner = memo.post_cleaner
+    else:
+        post_cleaner = tp.post_cleaner
+    if profile_stages:
+        page_start = time.perf_counter()
+        page_bytes = 0
+
+    for rev in revisions:
+        nb_revisions += 1
+        if profile_stages:
+            page_bytes += get_text_bytes(rev, namespace) or 0
+        if page_watchdog is not None:
+            page_watchdog.check(get_text_bytes(rev, namespace) or 0)
+        if skip_reverts:
+            sha1 = rev.findtext(namespace + "sha1")
+            if sha1 and sha1 in history:
+                # Same text as a recent revision: go back to that revision without cleaning this one.
+                nb_pairs, old_sentences = history[sha1]
+                while next(reversed(history)) != sha1: # Forget the reverted revisions.
+                    history.popitem()
+                del X[nb_pairs:], y[nb_pairs:], titles[nb_pairs:], timestamps[nb_pairs:], comments[nb_pairs:]
+                if paragraph_diff:
+                    old_paragraphs = old_sentences
+                else:
+                    old_revision = old_sentences
+                pending_text = None
+                old_bytes = get_text_bytes(rev, namespace)
+                timestamp2 = get_info("timestamp", rev, namespace=namespace)
+                skipped_revisions += 1
+                rev.clear()
+                continue
+
+        text = get_info("text", rev, namespace=namespace) # Get the page text of the revision.
+
+        if text != None and not first_page:
+            pair_filter = get_pair_filter(rev, namespace, old_bytes)
+            if pair_filter:
+                # The pair isn't aligned, the revision becomes the previous revision without being cleaned.
+                pair_filter_counts[pair_filter] += 1
+                pending_text = text
+                old_bytes = get_text_bytes(rev, namespace)
+                timestamp2 = get_info("timestamp", rev, namespace=namespace)
+                rev.clear()
+                continue
+            if pending_text is not None:
+                # Clean the previous revision now that it's needed.
+                pending_text = tp.pre_cleaner_incremental(pending_text, clean_cache) if incremental_cleaning else tp.pre_cleaner(pending_text)
+                if paragraph_diff:
+                    old_paragraphs = tp.split_paragraphs(pending_text)
+                else:
+                    old_revision = tp.split_text(pending_text)
+                pending_text = None
+
+        if text != None:
+            # Pre clean the text (remove certain wikitext markup elements for example).
+            if incremental_cleaning:
+                text = tp.pre_cleaner_incremental(text, clean_cache)
+            else:
+                text = tp.pre_cleaner(text)
+        else:
+            failed = True
+
+        if not failed:
+            if not first_page:
+                # Get revision metadata
+                timestamp1 = get_info("timestamp", rev, namespace=namespace)
+                comment = get_info("comment", rev, namespace=namespace)
+                try:
+                    # Split the revision text into sentences
+                    if paragraph_diff:
+                        # Only the paragraphs that changed since the previous revision are split.
+                        new_paragraphs = tp.split_paragraphs(text)
+                        changed_paragraphs, old_changed_paragraphs = tp.filter_changed_sentences(new_paragraphs, old_paragraphs)
+                        new_revision = tp.split_text("\n".join(changed_paragraphs))
+                        old_revision = tp.split_text("\n".join(old_changed_paragraphs))
+                    else:
+                        new_revision = tp.split_text(text)
+                except TypeError:
+                    logging.warning("TypeError from tp.split_text. Parameter Text: %s" % text)
+                    new_revision = [""]
+
+                if hashed_diff:
+                    new_revision_sents, old_revision_sents = tp.filter_changed_sentences(new_revision, old_revision)
+                else:
+                    new_revision_sents, old_revision_sents = tp.filter_direct_matches(new_revision, old_revision)
+                prefix = 0 if hashed_diff else 2 # filter_direct_matches prefixes the sentences with "! " or "+ ".
+                if memo_size:
+                    candidates = tuple(new_revision_sents)
+                elif indexed_alignment or similarity_kernel != "difflib":
+                    index = alignment.build_index(new_revision_sents)
+
+                for sentence in old_revision_sents:
+                    # Get the closest matching sentence.
+                    if memo_size:
+                        match = memo.align(sentence, candidates, cutoff_rate, indexed_alignment, similarity_kernel)
+                    elif indexed_alignment or similarity_kernel != "difflib":
+                        match = alignment.get_close_matches(sentence, index, cutoff=cutoff_rate, kernel=similarity_kernel)
+                    else:
+                        match = get_close_matches(sentence, new_revision_sents, n=1, cutoff=cutoff_rate)
+                    if match: # If the sentence has a 'look alike' (correction)
+                        try:
+                            # Clean the remaining templates and wikimarkup files.
+                            match = post_cleaner(match[0][prefix:])
+                            sentence = post_cleaner(sentence[prefix:])
+                        except AttributeError:
+                            logging.warning(f"AttributeError: Failed to clean the pairs of sentences: match: {match} sentence: {sentence}")
+                            match = False
+                        if match and not match == sentence:
+                            # Save the sentence to the results lists.
+                            y.append(re.sub(r'\n', '', match))
+                            X.append(re.sub(r"\n", "", sentence))
+                            titles.append(title)
+                            timestamps.append(timestamp1 + " " + timestamp2)
+                            comments.append(comment)
+
+                # Set the new revision to the old revision.
+                timestamp2 = timestamp1
+                if paragraph_diff:
+                    old_paragraphs = new_paragraphs
+                else:
+                    old_revision = new_revision
+                if skip_reverts and sha1:
+                    history[sha1] = (len(X), old_paragraphs if paragraph_diff else old_revision)
+
+            else:
+                # This code executes if the revision is the first revision of the page.
+                if paragraph_diff:
+                    old_paragraphs = tp.split_paragraphs(text)
+                else:
+                    old_revision = tp.split_text(text)
+                timestamp2 = get_info("timestamp", rev, namespace=namespace)
+                first_page = False
+                if skip_reverts and sha1:
+                    history[sha1] = (len(X), old_paragraphs if paragraph_diff else old_revision)
+        else:
+            failed = False
+        if max_bytes_delta is not None and text != None:
+            old_bytes = get_text_bytes(rev, namespace)
+        rev.clear() # Clear the revision from memory
+        if len(history) > revert_window:
+            del history[next(iter(history))]
+
+    if dedup_pairs:
+        # Done once the page is extracted: the pairs of reverted revisions may have been dropped (skip_reverts).
+        nb_pairs = len(X)
+        X, y, titles, timestamps, comments = dedup.drop_duplicates(X, y, titles, timestamps, comments, seen=set())
+        dropped_pairs["page"] += nb_pairs - len(X)
+
+    if profile_stages:
+        stage_timing.record_page(nb_revisions, page_bytes, time.perf_counter() - page_start)
+
+    return X, y, titles, timestamps, comments, nb_revisions
+
+
 def extract_page(page, namespace="", extracted_titles=[], max_revisions=1800, min_revisions=25, n=0):
     """
     Gets all the X, y pairs of a wikipedia page as well as metadata like the title of the page, the timestamps, and the comments of the user eddits.
     Args:
         - page: an xml object parsed with lxml.etree. The wikipedia page in dump format (wikitext markup).
         - namespace: the potential namespace of the page.
-        - extracted_titles: a list of strings representing the titles of already extracted wikipedia pages. Will not extract the page if the title of the page is in the extracted_titles list.
+        - extracted_titles: a set of strings representing the titles of already extracted wikipedia pages. Will not extract the page if the title of the page is in the extracted_titles set.
         - max_revisions: maximum number of accepted revisions in a wikipedia page. Will not extract the page if the pages has more revisions than the maximum number of revisions.
         - min_revisions: minimum number of accepted revisions in a wikipedia page. Will not extract the page if the pages has less revisions than the minimum number of revisions.
         - n: id (of type int) of the worker that calls this function.
@@ -91,9 +477,6 @@ def extract_page(page, namespace="", extracted_titles=[], max_revisions=1800, mi
     comments = []
     title = ""
 
-    failed = False
-    first_page = True
-
     # get the title of the page
     try:
         title = page.find(namespace + "title")
@@ -104,92 +487,154 @@ def extract_page(page, namespace="", extracted_titles=[], max_revisions=1800, mi
     if title != None:
         title = title.text
 
-    if not tp.check_title(title) and not title in extracted_titles: # Checks that the page is desirable
+    if is_desirable(title, page.findtext(namespace + "ns"), page.findtext(namespace + "id"), extracted_titles): # Checks that the page is desirable
         revisions = page.findall(namespace + "revision")
         nb_revisions = len(revisions)
 
         if nb_revisions <= max_revisions or nb_revisions >= min_revisions: # Checks that the number of revisions is within the limit defined.
-            for rev in page.findall(namespace + "revision"):
-                text = get_info("text", rev, namespace=namespace) # Get the page text of the revision.
-
-                if text != None:
-                    text = tp.pre_cleaner(text) # Pre clean the text (remove certain wikitext markup elements for example).
-                else:
-                    failed = True
-
-                if not failed:
-                    if not first_page:
-                        # Get revision metadata
-                        timestamp1 = get_info("timestamp", rev, namespace=namespace)
-                        comment = get_info("comment", rev, namespace=namespace)
-                        try:
-                            # Split the revision text into sentences
-                            new_revision = tp.split_text(text)
-                        except TypeError:
-                            logging.warning("TypeError from tp.split_text. Parameter Text: %s" % text)
-                            new_revision = [""]
-
-                        new_revision_sents, old_revision_sents = tp.filter_direct_matches(new_revision, old_revision)
-                        
-                        for sentence in old_revision_sents:
-                            # Get the closest matching sentence.
-                            match = get_close_matches(sentence, new_revision_sents, n=1, cutoff=cutoff_rate)
-                            if match: # If the sentence has a 'look alike' (correction)
-                                try:
-                                    # Clean the remaining templates and wikimarkup files.
-                                    match = tp.post_cleaner(match[0][2:])
-                                    sentence = tp.post_cleaner(sentence[2:])
-                                except AttributeError:
-                                    logging.warning(f"AttributeError: Failed to clean the pairs of sentences: match: {match} sentence: {sentence}")
-                                    match = False
-                                if match and not match == sentence:
-                                    # Save the sentence to the results lists.
-                                    y.append(re.sub(r'\n', '', match))
-                                    X.append(re.sub(r"\n", "", sentence))
-                                    titles.append(title)
-                                    timestamps.append(timestamp1 + " " + timestamp2)
-                                    comments.append(comment)
-                        
-                        # Set the new revision to the old revision.
-                        timestamp2 = timestamp1
-                        old_revision = new_revision
-
-                    else:
-                        # This code executes if the revision is the first revision of the page.
-                        old_revision = tp.split_text(text)
-                        timestamp2 = get_info("timestamp", rev, namespace=namespace)
-                        first_page = False
-                else:
-                    failed = False
-                rev.clear() # Clear the revision from memory
-            
+            page_watchdog = start_watchdog(hard_timeout=True)
+            try:
+                try:
+                    X, y, titles, timestamps, comments, _ = extract_revisions(revisions, title, namespace, page_watchdog)
+                finally:
+                    if page_watchdog is not None:
+                        page_watchdog.stop()
+            except watchdog.PageBudgetExceeded as e:
+                page_watchdog.stop() # The alarm may have fired before the first stop.
+                quarantine_page(title, page.findtext(namespace + "id"), str(e))
             total_revisions += nb_revisions
+            progress.revisions += nb_revisions
         pages_extracted += 1
 
-    if pages_extracted % 2:
-        file_status_update(n)
+    file_status_update(n)
     page.clear()
 
     return X, y, titles, timestamps, comments
 
 
-def extract_file(file_path: str, namespace: str, extracted_titles: list, save_path: str, max_revisions=1800, min_revisions=25, n=0, save_interval=3600) -> None:
+def iter_pages(source, namespace=""):
     """
-    Function to extract whole wikipedia dumps (.xml files). Saves the extracted sentences (X, y pairs) to save_path in csv format every save_interval (in seconds) with columns: 'X', 'y', 'timestamp', 'title', 'comments'.
-
+    Streams the pages of a wikipedia dump revision by revision. Yields a (title, ns, page_id, revisions) tuple for every page as soon as the id of the page has been parsed, where revisions is a generator of the revision elements of the page.
+    Every revision is cleared and detached from its page once it has been consumed, so only one revision is built in memory at a time whatever the size of the page's history.
+    The revisions of a page must be consumed before moving on to the next page, the remaining revisions are skipped otherwise.
     Args:
-        - file_path: complete path to the wikipedia dump .xml file to extract.
+        - source: path to the wikipedia dump .xml file (or a file object).
         - namespace: the namespace of the .xml file if it has one.
-        - extracted_title: a list of already extracted wikipedia pages so that the program can resume extracting from where it left off. If first time extracting the file, should be an empty list.
-        - save_path: a directory for saving the results of the extraction.
-        - max_revisions: maximum number of accepted revisions in a wikipedia page.
-        - min_revisions: minimum number of accepted revisions in a wikipedia page.
-        - n: id of the worker. Important to be different from the other workers if using multiprocessing.
-        - save_interval: how often to save the results of the extraction in seconds.
     """
+    page_tag = namespace + "page"
+    title_tag = namespace + "title"
+    ns_tag = namespace + "ns"
+    id_tag = namespace + "id"
+    revision_tag = namespace + "revision"
+    events = iter(etree.iterparse(source, events=("end",), tag=(page_tag, title_tag, ns_tag, id_tag, revision_tag)))
+
+    title = None
+    ns = None
+    for _, elem in events:
+        if elem.tag == title_tag:
+            title = elem.text
+            ns = None
+        elif elem.tag == ns_tag:
+            ns = elem.text
+        elif elem.tag == id_tag:
+            # The id of the page comes after its title and ns, and before its revisions.
+            revisions = _iter_revisions(events, page_tag, revision_tag)
+            yield title, ns, elem.text, revisions
+            for _ in revisions: # Skip the revisions that haven't been consumed.
+                pass
+
+
+def _iter_revisions(events, page_tag: str, revision_tag: str):
+    """
+    Yields the revision elements of the current page from the iterparse events until the end of the page. Belongs to the iter_pages function.
+    """
+    for _, elem in events:
+        if elem.tag == page_tag:
+            _free_element(elem)
+            return
+        if elem.tag == revision_tag: # The other events are the ids of the revisions and of their contributors.
+            yield elem
+            _free_element(elem)
 
-    logging.info(f"Starting extraction of file: {file_path} with worker number: {n}")
 
+def _free_element(elem) -> None:
+    """
+    Clears an element built by iterparse and deletes its already processed previous siblings so that the tree doesn't keep growing.
+    """
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
+
+
+def extract_page_stream(title: str, revisions, namespace="", extracted_titles=[], max_revisions=1800, min_revisions=25, n=0, ns=None, page_id=None):
+    """
+    Streaming version of extract_page. Gets all the X, y pairs of a wikipedia page from the revisions streamed by iter_pages.
+    Args:
+        - title: the title of the wikipedia page.
+        - revisions: a generator of the revision elements of the page (see iter_pages).
+        - ns, page_id: the namespace (<ns>) and the id of the page (see is_desirable).
+        - the other arguments are the same as extract_page.
+    The number of revisions is only known once the page has been streamed, the results of the page are therefore discarded afterwards if it isn't within the limits.
+    """
+    global pages_extracted
+    global total_revisions
+    # The results lists.
+    y = []
+    X = []
+    titles = []
+    timestamps = []
+    comments = []
+
+    if is_desirable(title, ns, page_id, extracted_titles): # Checks that the page is desirable, its revisions are skipped otherwise
+        # No hard timeout: interrupting the parsing of the dump would break the iteration over the pages.
+        page_watchdog = start_watchdog()
+        try:
+            X_, y_, titles_, timestamps_, comments_, nb_revisions = extract_revisions(revisions, title, namespace, page_watchdog)
+        except watchdog.PageBudgetExceeded as e:
+            quarantine_page(title, page_id, str(e))
+            X_, y_, titles_, timestamps_, comments_, nb_revisions = [], [], [], [], [], 0
+
+        if nb_revisions <= max_revisions or nb_revisions >= min_revisions: # Checks that the number of revisions is within the limit defined.
+            X, y, titles, timestamps, comments = X_, y_, titles_, timestamps_, comments_
+            total_revisions += nb_revisions
+            progress.revisions += nb_revisions
+        pages_extracted += 1
+
+    file_status_update(n)
+
+    return X, y, titles, timestamps, comments
+
+
+def iter_page_results(source, namespace: str, extracted_titles: frozenset, max_revisions=1800, min_revisions=25, n=0, skip_pages=0):
+    """
+    Yields the results of extract_page (or extract_page_stream if stream_revisions) for every page of a wikipedia dump, in order. Yields None for the first skip_pages pages, which are not extracted.
+    """
+    if stream_revisions:
+        for i, (title, ns, page_id, revisions) in enumerate(iter_pages(source, namespace)):
+            if i < skip_pages:
+                yield None
+            else:
+                yield extract_page_stream(title, revisions, namespace, extracted_titles, max_revisions, min_revisions, n, ns, page_id)
+    else:
+        # Using the iterparse to be able to handle huge files.
+        for i, (_, elem) in enumerate(etree.iterparse(source, tag=namespace + 'page')):
+            if i < skip_pages:
+                elem.clear()
+                yield None
+            else:
+                yield extract_page(elem, namespace, extracted_titles, max_revisions, min_revisions, n)
+
+
+def extract_source(source, namespace: str, extracted_titles: frozenset, save_path: str, max_revisions=1800, min_revisions=25, n=0, save_interval=3600, checkpoint_id=None, skip_pages=0, saves=0) -> None:
+    """
+    Extracts all the pages of a wikipedia dump and saves the extracted sentences (X, y pairs) to save_path every time the flush policy (see should_flush) is met. Used by extract_file and extract_shard.
+    Args:
+        - source: path to the wikipedia dump .xml file or a binary file object reading it (see sharding.ShardReader and checkpoints.OffsetReader). The quarantined pages of a checkpoints.OffsetReader are written with their offset in the dump.
+        - checkpoint_id: if not None, a checkpoint is written after every save (see checkpoints.py). source must then be a checkpoints.OffsetReader.
+        - skip_pages: number of pages skipped at the beginning of the source (already saved pages of a resumed extraction).
+        - saves: number of files of results already saved by this worker (resumed extraction).
+        - the other arguments are the same as extract_file.
+    """
     # Set some variables
 
     # results:
@@ -199,20 +644,41 @@ def extract_file(file_path: str, namespace: str, extracted_titles: list, save_pa
     timestamps = []
     comments = []
 
-    c = 0 # count for the number of saves (rename)
-    if extracted_titles:
-        resumed = False
-    else:
-        resumed = True
-
+    c = saves # count for the number of saves (rename)
+    buffer_size = 0 # estimated size of the results in bytes
+    last_save = time.time()
+    if extracted_titles is None:
+        extracted_titles = resume_titles
+    if profile_stages:
+        enable_stage_timing()
+    global pair_bloom
+    if dedup_pairs and pair_bloom is None:
+        pair_bloom = dedup.BloomFilter(dedup_bloom_bits)
+
+    # The titles of extracted_titles are skipped in the whole source: iter_page_results keeps the set it was given.
+    pages = iter_page_results(source, namespace, extracted_titles, max_revisions, min_revisions, n, skip_pages)
+
+    # A checkpoints.OffsetReader (possibly wrapped in a progress.ProgressReader) records the offsets of the pages.
+    has_offsets = hasattr(source, "pop")
+    offset = None
     try:
-        for _, elem in etree.iterparse(file_path, tag=namespace + 'page'): # Using the iterparse to be able to handle huge files.
-            X_, y_, titles_, timestamps_, comments_ = extract_page(elem, namespace, extracted_titles, max_revisions, min_revisions, n)
-
-            if not X == [] and not resumed: # Checks if we have resumed resumed from where we left off
-                extracted_titles = []
-                resumed = True
-                logging.info(f"resumed with worker: {n}")
+        for results in pages:
+            if has_offsets:
+                offset = source.pop() # Offset of the page of the results.
+            if quarantined:
+                watchdog.write_quarantine(save_path, n, [dict(entry, offset=offset) for entry in quarantined])
+                if offset is not None:
+                    quarantined_offsets.add(offset)
+                else:
+                    quarantined_ids.update(int(entry["id"]) for entry in quarantined if entry["id"] is not None)
+                quarantined.clear()
+            if results is None: # Skipped page
+                continue
+            X_, y_, titles_, timestamps_, comments_ = results
+            if dedup_pairs and X_:
+                nb_pairs = len(X_)
+                X_, y_, titles_, timestamps_, comments_ = dedup.drop_duplicates(X_, y_, titles_, timestamps_, comments_, bloom=pair_bloom)
+                dropped_pairs["global"] += nb_pairs - len(X_)
 
             for i in range(len(titles_)): # Destructure and add the results from the extract_page function to the main results variables.
                 X.append(X_[i])
@@ -220,12 +686,19 @@ def extract_file(file_path: str, namespace: str, extracted_titles: list, save_pa
                 titles.append(titles_[i])
                 timestamps.append(timestamps_[i])
                 comments.append(comments_[i])
+            if titles_:
+                buffer_size += estimate_size(X_, y_, titles_, timestamps_, comments_)
 
-            if (time.time() - start) > save_interval:
+            if should_flush(len(X), buffer_size, last_save, save_interval):
                 # Save the collected data in the files
                 save_progress(X, y, titles, timestamps, comments, save_path, n, c)
+                if profile_stages:
+                    stage_timing.save_report(save_path, n)
                 c += 1
-                save_interval = save_interval*2
+                buffer_size = 0
+                last_save = time.time()
+                if checkpoint_id is not None:
+                    checkpoints.save_checkpoint(save_path, checkpoint_id, source.file_path, offset, c)
 
                 # Reset the results variables
                 X = []
@@ -242,11 +715,171 @@ def extract_file(file_path: str, namespace: str, extracted_titles: list, save_pa
 
     # Final save
     save_progress(X, y, titles, timestamps, comments, save_path, n, c)
+    if profile_stages:
+        stage_timing.save_report(save_path, n)
+
+
+def extract_file(file_path: str, namespace: str, extracted_titles: frozenset, save_path: str, max_revisions=1800, min_revisions=25, n=0, save_interval=3600) -> None:
+    """
+    Function to extract whole wikipedia dumps (.xml files, or .bz2/.7z compressed files). Saves the extracted sentences (X, y pairs) to save_path (see save_progress) with columns: 'X', 'y', 'timestamp', 'title', 'comments' every time the buffered results exceed max_buffer_rows or max_buffer_bytes, or save_interval seconds after the last save.
+
+    Args:
+        - file_path: complete path to the wikipedia dump .xml (or .bz2/.7z) file to extract.
+        - namespace: the namespace of the .xml file if it has one.
+        - extracted_title: a set of already extracted wikipedia pages so that the program can resume extracting from where it left off. If first time extracting the file, should be empty. None: the set shared by the pool (see init_worker).
+        - save_path: a directory for saving the results of the extraction.
+        - max_revisions: maximum number of accepted revisions in a wikipedia page.
+        - min_revisions: minimum number of accepted revisions in a wikipedia page.
+        - n: id of the worker. Important to be different from the other workers if using multiprocessing. If use_checkpoints (and the file isn't compressed), the name of the file is used instead so that a resumed extraction continues its own results files.
+        - save_interval: maximum time between two saves of the results of the extraction in seconds (None: no time limit).
+    """
+
+    logging.info(f"Starting extraction of file: {file_path} with worker number: {n}")
+    file_name = os.path.basename(file_path)
+    quarantined_offsets.clear()
+    quarantined_ids.clear()
+    if compressed_dumps.is_compressed(file_path):
+        # Compressed dumps are decompressed on the fly.
+        with compressed_dumps.open_dump(file_path, decompress_threads) as source:
+            extract_source(progress.open_progress(source, file_name), namespace, extracted_titles, save_path, max_revisions, min_revisions, n, save_interval)
+    elif use_checkpoints:
+        # The checkpoints and the results are named after the file so that they don't depend on the worker number, which changes between runs.
+        n = file_name
+        source, skip_pages, saves = checkpoints.open_source(file_path, save_path, file_name)
+        try:
+            extract_source(progress.open_progress(source, file_name), namespace, extracted_titles, save_path, max_revisions, min_revisions, n, save_interval, file_name, skip_pages, saves)
+        finally:
+            source.close()
+    else:
+        # The offsets of the pages are recorded for the quarantine file (see retry_quarantined_pages).
+        source = checkpoints.OffsetReader(open(file_path, "rb"), file_path)
+        try:
+            extract_source(progress.open_progress(source, file_name, os.path.getsize(file_path)), namespace, extracted_titles, save_path, max_revisions, min_revisions, n, save_interval)
+        finally:
+            source.close()
+    if retry_quarantined and (quarantined_offsets or quarantined_ids):
+        retry_quarantined_pages(file_path, namespace, save_path, max_revisions, min_revisions, n, save_interval)
+    checkpoints.remove_checkpoint(save_path, file_name)
     # Delete the wikipedia dump file after it has been completely extracted.
     logging.info(f"Done extracting. Deleting file: {file_path}")
     os.remove(file_path)
 
 
+def retry_quarantined_pages(file_path: str, namespace: str, save_path: str, max_revisions=1800, min_revisions=25, n=0, save_interval=3600, end=None, header_end=None) -> None:
+    """
+    Extracts again, without budgets, the pages of a wikipedia dump quarantined by the watchdog during its extraction. The results are saved with the worker id '{n}_retry'.
+    The pages of a plain .xml dump are read directly at their offsets (quarantined_offsets, see sharding.PagesReader). A compressed dump can't be read at an offset, so it is parsed again and only the quarantined pages are extracted (quarantined_ids).
+    Args:
+        - end, header_end: the end of the shard and the offset of the first page of the dump if the pages belong to a shard (see extract_shard).
+        - the other arguments are the same as extract_file.
+    """
+    global page_ids, max_page_seconds, max_page_bytes
+    logging.info(f"Retrying the {len(quarantined_offsets) or len(quarantined_ids)} quarantined pages of {file_path} without budgets")
+    budgets = page_ids, max_page_seconds, max_page_bytes
+    max_page_seconds, max_page_bytes = None, None
+    if quarantined_offsets:
+        with open(file_path, "rb") as f:
+            if header_end is None:
+                header_end = sharding.find_next_page(f, 0)
+            if end is None:
+                end = sharding.find_end(f)
+            ranges = sharding.get_page_ranges(f, quarantined_offsets, end)
+        source = sharding.PagesReader(file_path, ranges, header_end)
+    else:
+        page_ids = set(quarantined_ids)
+        source = compressed_dumps.open_dump(file_path, decompress_threads)
+    quarantined_offsets.clear()
+    quarantined_ids.clear()
+    try:
+        extract_source(source, namespace, frozenset(), save_path, max_revisions, min_revisions, f"{n}_retry", save_interval)
+    finally:
+        page_ids, max_page_seconds, max_page_bytes = budgets
+        source.close()
+
+
+def extract_file_task(args: tuple) -> tuple:
+    """
+    Runs extract_file with the tuple of arguments args in a pool (see the file scheduler of __main__). Returns the path of the file and the error that stopped its extraction, None if it has been completely extracted.
+    """
+    try:
+        extract_file(*args)
+    except Exception as e:
+        logging.exception(f"Extraction of file {args[0]} failed")
+        return args[0], repr(e)
+    return args[0], None
+
+
+def record_file_status(save_path: str, file_path: str, error=None) -> None:
+    """
+    Appends the completion (or the error) of the extraction of a file to save_path/files_status.txt, one line per file. A shard is recorded with its id in place of file_path (see get_shard_id).
+    """
+    status = "done" if error is None else f"failed: {error}"
+    logging.info(f"File {file_path} {status}")
+    with open(os.path.join(save_path, "files_status.txt"), "a", encoding="utf-8") as f:
+        f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}\t{os.path.basename(file_path)}\t{status}\n")
+
+
+def get_shard_id(file_path: str, k: int) -> str:
+    """
+    Returns the id of the k-th shard of a wikipedia dump. Used as the worker id of the shard so that the output and resume files of a shard keep the same name between runs.
+    """
+    return f"{os.path.basename(file_path)}_shard_{k}"
+
+
+def is_shard_done(save_path: str, shard_id: str) -> bool:
+    """
+    Checks if a shard has already been completely extracted (see extract_shard).
+    """
+    return os.path.exists(os.path.join(save_path, shard_id + ".done"))
+
+
+def extract_shard(file_path: str, namespace: str, extracted_titles: frozenset, save_path: str, start: int, end: int, header_end: int, max_revisions=1800, min_revisions=25, shard_id="", save_interval=3600) -> None:
+    """
+    Extracts the pages of a shard of a wikipedia dump (see sharding.get_shards). The results are saved like extract_file with shard_id as the worker id, and an empty '{shard_id}.done' file is created in save_path once the shard is completely extracted so that a resumed extraction skips it.
+    Unlike extract_file, the dump file isn't deleted.
+
+    Args:
+        - start, end: the byte range of the shard in the dump.
+        - header_end: the offset of the first page of the dump.
+        - shard_id: id of the shard (see get_shard_id). Used as the worker id.
+        - the other arguments are the same as extract_file.
+    """
+    if is_shard_done(save_path, shard_id):
+        logging.info(f"Shard {shard_id} has already been extracted, skipping it.")
+        return
+
+    logging.info(f"Starting extraction of shard: {shard_id} (bytes {start} to {end} of {file_path})")
+    quarantined_offsets.clear()
+    quarantined_ids.clear()
+    if use_checkpoints:
+        source, skip_pages, saves = checkpoints.open_source(file_path, save_path, shard_id, start, end, header_end)
+    else:
+        # The offsets of the pages are recorded for the quarantine file (see retry_quarantined_pages).
+        source, skip_pages, saves = checkpoints.OffsetReader(sharding.ShardReader(file_path, start, end, header_end), file_path, start - header_end), 0, 0
+    try:
+        extract_source(progress.open_progress(source, shard_id), namespace, extracted_titles, save_path, max_revisions, min_revisions, shard_id, save_interval, shard_id if use_checkpoints else None, skip_pages, saves)
+    finally:
+        source.close()
+    if retry_quarantined and quarantined_offsets:
+        retry_quarantined_pages(file_path, namespace, save_path, max_revisions, min_revisions, shard_id, save_interval, end, header_end)
+    open(os.path.join(save_path, shard_id + ".done"), "w").close()
+    checkpoints.remove_checkpoint(save_path, shard_id)
+    logging.info(f"Done extracting shard: {shard_id}")
+
+
+def extract_shard_task(args: tuple) -> tuple:
+    """
+    Runs extract_shard with the tuple of arguments args in a pool (see the shard scheduler of __main__). Returns the id of the shard and the error that stopped its extraction, None if it has been completely extracted.
+    """
+    shard_id = args[9]
+    try:
+        extract_shard(*args)
+    except Exception as e:
+        logging.exception(f"Extraction of shard {shard_id} failed")
+        return shard_id, repr(e)
+    return shard_id, None
+
+
 def exctraction_report(time: str, files_paths: str, results_path: str, max_revisions: int, min_revisions: int) -> None:
     """
     Creates .txt file that reports some information about the complete extraction of the extracted files.
@@ -268,8 +901,11 @@ if __name__ == "__main__":
     max_revisions = 5500
     min_revision = 25
     num_processes = 12 # Number of parallel processes (number of cpu cores)
-    save_interval = 45*60 # in seconds: every 45 minutes
+    save_interval = 45*60 # in seconds: at most 45 minutes between two saves of a worker (see also max_buffer_rows and max_buffer_bytes)
     resume_path = None
+    use_pipeline = False # Extracts the files with a reader process, a pool of page workers and a writer process instead of one process per file (see pipeline.py).
+    shard_size = None # in bytes: if set, every file is split into shards of about this size that are extracted in parallel by all the processes (see sharding.py).
+    show_progress = True # Logs the throughput and ETA of every file and of the whole extraction (see progress.py).
 
     # If num_processes exceeds maximum hardware limit (number of cpu cores), resets it to the number of cores available:
     max_cpu = cpu_count()
@@ -292,9 +928,15 @@ if __name__ == "__main__":
         logging.error("Path to directory does not exist: " +  result_directory)
         raise ValueError
 
+    # Checks that the results can be saved before starting the workers, _save_parquet would only fail at their first save.
+    if output_format == "parquet" and pa is None:
+        logging.error("Saving the results in parquet format requires the pyarrow package (pip install pyarrow).")
+        raise ImportError("pyarrow is required by output_format = 'parquet'")
+
     # If resume_path is specified, then all the titles from the last exctraction stored in resume_path will be stored in titles list.
+    titles = frozenset()
     if resume_path:
-        titles = get_extracted_titles(resume_path)
+        titles = get_extracted_titles(resume_path, num_processes)
         if titles:
             logging.info("Done loading resume data from %s", resume_path)
             logging.info("Number of titles extracted: %s", len(titles))
@@ -307,20 +949,67 @@ if __name__ == "__main__":
     # We get the full path to all of the wikipedia dump files:
     source_xml_files = []
     for file_path in files_to_extract:
-        if file_path.endswith(".xml"):
+        if file_path.endswith(".xml") or compressed_dumps.is_compressed(file_path):
             source_xml_files.append(extraction_directory + "\\" + file_path)
 
-    # Selects the files to extracts if there are too many.
-    if len(source_xml_files) > num_processes:
-        source_xml_files = source_xml_files[:num_processes]
-        logging.info(f"Cannot extract more than '{num_processes}' files at a time (num_processes) due to hardware limitations. Will only extract the first 8 files: {source_xml_files}")
-
-    extraction_pool = pool.Pool(num_processes)
-    try:
-        # Starting the extraction by calling the extract_file function with pool for every file to extract.
-        extraction_pool.starmap(extract_file, [(source_xml_files[i], namespace, titles, result_directory, max_revisions, min_revision, i, save_interval) for i in range(len(source_xml_files))])
-    except TypeError:
-        logging.error("There is a huge type error in main file extraction_pool.startmap method!!!")
+    progress_queue = None
+    if show_progress:
+        progress_queue = Queue()
+        # The overall ETA needs the size of the dumps, unknown for the compressed dumps.
+        total_size = None if any(compressed_dumps.is_compressed(file_path) for file_path in source_xml_files) else sum(os.path.getsize(file_path) for file_path in source_xml_files)
+        monitor = progress.Monitor(progress_queue, total_size)
+        monitor.start()
+
+    # The workers of a pool share one bloom filter of the extracted pairs, the pipeline writer has its own.
+    bloom = None
+    if dedup_pairs and not use_pipeline:
+        bloom = dedup.BloomFilter(dedup_bloom_bits, shared=True)
+
+    if use_pipeline:
+        # The reader and the writer take a process each.
+        import pipeline
+        pipeline.run_pipeline(source_xml_files, namespace, titles, result_directory, max(1, num_processes - 2), max_revisions, min_revision, save_interval, progress_queue=progress_queue)
+    elif shard_size:
+        extraction_pool = pool.Pool(num_processes, init_worker, (titles, progress_queue, bloom))
+        # Every file is split into shards and the shards of all the files are extracted by the pool.
+        shards = []
+        compressed_tasks = []
+        for i, file_path in enumerate(source_xml_files):
+            if compressed_dumps.is_compressed(file_path):
+                # Compressed dumps can't be sharded by byte offsets, they are extracted whole.
+                compressed_tasks.append(extraction_pool.apply_async(extract_file_task, ((file_path, namespace, None, result_directory, max_revisions, min_revision, i, save_interval),)))
+                continue
+            header_end, file_shards = sharding.get_shards(file_path, shard_size)
+            for k, (shard_start, shard_end) in enumerate(file_shards):
+                shards.append((file_path, namespace, None, result_directory, shard_start, shard_end, header_end, max_revisions, min_revision, get_shard_id(file_path, k), save_interval))
+            logging.info(f"Split file {file_path} into {len(file_shards)} shards")
+        for shard_id, error in extraction_pool.imap_unordered(extract_shard_task, shards, chunksize=1):
+            record_file_status(result_directory, shard_id, error)
+        for task in compressed_tasks:
+            record_file_status(result_directory, *task.get())
+        extraction_pool.close()
+        extraction_pool.join()
+
+        # Delete the wikipedia dump files once all their shards have been extracted.
+        for file_path in source_xml_files:
+            if not compressed_dumps.is_compressed(file_path) and all(is_shard_done(result_directory, shard[9]) for shard in shards if shard[0] == file_path):
+                logging.info(f"Done extracting. Deleting file: {file_path}")
+                os.remove(file_path)
+    else:
+        extraction_pool = pool.Pool(num_processes, init_worker, (titles, progress_queue, bloom))
+        # All the files are queued, largest first, and every worker takes the next file as soon as it's done with its file.
+        source_xml_files.sort(key=os.path.getsize, reverse=True)
+        tasks = [(source_xml_files[i], namespace, None, result_directory, max_revisions, min_revision, i, save_interval) for i in range(len(source_xml_files))]
+        for file_path, error in extraction_pool.imap_unordered(extract_file_task, tasks, chunksize=1):
+            record_file_status(result_directory, file_path, error)
+        extraction_pool.close()
+        extraction_pool.join()
+
+    if bloom is not None:
+        bloom.close()
+        bloom.unlink()
+    if show_progress:
+        monitor.stop()
 
     # Display final info & results
     hours, minutes, seconds, elapsed = get_time()
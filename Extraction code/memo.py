@@ -0,0 +1,68 @@
+"""
+Per-worker memoisation of the post_cleaner results and of the sentence alignments (main.memo_size).
+The same sentences are found in hundreds of consecutive revisions of a page, and edit wars align the same pairs of revisions over and over: the results are kept in bounded LRU caches (functools.lru_cache) so that they are only computed once.
+The alignments are keyed by the sentence, the candidate sentences (a tuple) and the alignment settings. The hits and misses of the caches are written to the status file of the worker (see main.file_status_update).
+"""
+
+import difflib
+import functools
+import alignment
+import text_processing_tools as tp
+
+# Maximum number of entries of every cache, 0 if the caches aren't enabled (see enable).
+size = 0
+post_cleaner = None
+align = None
+_get_index = None
+
+
+def enable(max_size: int) -> None:
+    """
+    Creates the caches with max_size entries each. Does nothing if they already have that size, the caches are emptied otherwise.
+    """
+    global size, post_cleaner, align, _get_index
+    if max_size == size:
+        return
+    size = max_size
+    post_cleaner = functools.lru_cache(maxsize=max_size)(_post_cleaner)
+    align = functools.lru_cache(maxsize=max_size)(_align)
+    # The index of the candidates is built on the first miss of a revision and reused for the other sentences of the revision.
+    _get_index = functools.lru_cache(maxsize=1)(_build_index)
+
+
+def _post_cleaner(sentence: str) -> str:
+    # tp.post_cleaner is looked up at every call so that it can be timed (see stage_timing.instrument).
+    return tp.post_cleaner(sentence)
+
+
+def _build_index(candidates: tuple) -> dict:
+    return alignment.build_index(candidates)
+
+
+def _align(sentence: str, candidates: tuple, cutoff: float, indexed: bool, kernel: str) -> list[str]:
+    """
+    Returns a list with the closest match of sentence among candidates, or an empty list (see the alignment modes of main.py).
+    Args:
+        - sentence: the sentence of the previous revision.
+        - candidates: the changed sentences of the new revision.
+        - cutoff: the minimum similarity of the match.
+        - indexed: scores the candidates best first with the indexed alignment (see alignment.py).
+        - kernel: the similarity kernel (see similarity.py), "difflib" uses difflib.get_close_matches unless indexed.
+    """
+    if indexed or kernel != "difflib":
+        return alignment.get_close_matches(sentence, _get_index(candidates), cutoff=cutoff, kernel=kernel)
+    # difflib.get_close_matches is looked up at every call so that it can be timed (see stage_timing.instrument).
+    return difflib.get_close_matches(sentence, candidates, n=1, cutoff=cutoff)
+
+
+def get_counts() -> dict:
+    """
+    Returns the hits and misses of the caches of the worker since they were enabled.
+    """
+    if not size:
+        return {}
+    counts = {}
+    for name, cache in (("post_cleaner", post_cleaner), ("alignment", align)):
+        info = cache.cache_info()
+        counts[name] = {"hits": info.hits, "misses": info.misses}
+    return counts
@@ -0,0 +1,227 @@
+"""
+Staged extraction pipeline: instead of one process per file doing everything, the extraction is split in three stages connected by bounded queues:
+    - a reader process parsing the pages of the dump files one file after the other and shipping the raw bytes of every page,
+    - a pool of page workers running extract_page on the pages,
+    - a writer process buffering the results and saving them to disk.
+The queues are bounded so that a fast reader blocks (backpressure) instead of filling the memory with pages, and all the workers stay busy whatever the sizes of the files.
+"""
+
+import logging
+import multiprocessing
+from multiprocessing import connection
+import os
+import time
+import lxml.etree as etree
+import checkpoints
+import compressed_dumps
+import dedup
+import main
+import progress
+import stage_timing
+import watchdog
+
+
+def reader(file_paths: list[str], namespace: str, page_queue, num_workers: int, progress_queue=None, failed_queue=None) -> None:
+    """
+    Parses the pages of every file and puts them in page_queue (see read_file). Puts one None per page worker at the end to stop them, even if the reader fails.
+    A file that can't be read (missing file, missing decompression library, corrupted archive...) is skipped, and its path and error are put in failed_queue if not None.
+    The progress of the reading is sent to progress_queue if not None (see progress.py).
+    """
+    progress.set_queue(progress_queue)
+    try:
+        for file_path in file_paths:
+            logging.info(f"Reader: starting to read file {file_path}")
+            try:
+                read_file(file_path, namespace, page_queue)
+            except Exception as e:
+                logging.exception(f"Reader: failed to read file {file_path}")
+                if failed_queue is not None:
+                    failed_queue.put((file_path, repr(e)))
+    finally:
+        for _ in range(num_workers):
+            page_queue.put(None)
+
+
+def read_file(file_path: str, namespace: str, page_queue) -> None:
+    """
+    Puts every page of a dump file in page_queue as a tuple (name of the file, offset of the page in the file, raw xml bytes of the page). The offset is None if the file is compressed (see reader).
+    """
+    file_name = os.path.basename(file_path)
+    if compressed_dumps.is_compressed(file_path):
+        file = compressed_dumps.open_dump(file_path, main.decompress_threads)
+        total = None
+    else:
+        # The offsets of the pages are recorded for the quarantine files of the page workers.
+        file = checkpoints.OffsetReader(open(file_path, "rb"), file_path)
+        total = os.path.getsize(file_path)
+    source = progress.open_progress(file, file_name, total)
+    try:
+        for _, elem in etree.iterparse(source, tag=namespace + "page"):
+            offset = file.pop() if isinstance(file, checkpoints.OffsetReader) else None
+            page_queue.put((file_name, offset, etree.tostring(elem)))
+            # Free the page and the already shipped pages.
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        logging.error(f"ERROR WITH iterparse for file {file_path}: {e}")
+    finally:
+        source.close()
+
+
+def page_worker(namespace: str, extracted_titles: frozenset, max_revisions: int, min_revisions: int, n: int, page_queue, result_queue, save_path: str, progress_queue=None) -> None:
+    """
+    Runs extract_page on the pages of page_queue and puts the non empty results in result_queue until it receives None. Puts its id n in result_queue when done.
+    A page whose extraction fails is logged and skipped, so that one bad page doesn't stop the worker (and the pipeline with it).
+    Writes the pages aborted by the watchdog to the quarantine file of the worker with their file and offset (see read_file), and its timing report at the end if main.profile_stages (both in save_path).
+    The number of revisions extracted by the worker is sent to progress_queue if not None (see progress.report_revisions).
+    """
+    progress.set_queue(progress_queue)
+    if main.profile_stages:
+        main.enable_stage_timing()
+    try:
+        while True:
+            item = page_queue.get()
+            if item is None:
+                break
+            file_name, offset, data = item
+            page = etree.fromstring(data)
+            try:
+                X, y, titles, timestamps, comments = main.extract_page(page, namespace, extracted_titles, max_revisions, min_revisions, n)
+            except Exception:
+                logging.exception(f"Page worker {n}: failed to extract page {page.findtext(namespace + 'title')}")
+                continue
+            if main.quarantined:
+                watchdog.write_quarantine(save_path, f"pipeline_{n}", [dict(entry, file=file_name, offset=offset) for entry in main.quarantined])
+                main.quarantined.clear()
+            if X:
+                result_queue.put((X, y, titles, timestamps, comments))
+            progress.report_revisions()
+    finally:
+        progress.report_revisions(force=True)
+        # Always notify the writer, otherwise it would wait forever for a failed worker.
+        result_queue.put(n)
+        if main.profile_stages:
+            stage_timing.save_report(save_path, f"pipeline_{n}")
+
+
+def writer(result_queue, save_path: str, num_workers: int, save_interval=3600) -> None:
+    """
+    Buffers the results of the page workers and saves them with save_progress when the flush policy is met (see main.should_flush) and once all the page workers are done (once it has received the id of every page worker).
+    If main.dedup_pairs, the pairs already extracted from another page are dropped with the bloom filter of the writer (see dedup.py).
+    """
+    X = []
+    y = []
+    titles = []
+    timestamps = []
+    comments = []
+
+    c = 0 # count for the number of saves (rename)
+    buffer_size = 0 # estimated size of the results in bytes
+    last_save = time.time()
+    bloom = dedup.BloomFilter(main.dedup_bloom_bits) if main.dedup_pairs else None
+    done = set() # ids of the page workers done
+    while len(done) < num_workers:
+        results = result_queue.get()
+        if isinstance(results, int):
+            done.add(results)
+            continue
+        X_, y_, titles_, timestamps_, comments_ = results
+        if bloom is not None:
+            nb_pairs = len(X_)
+            X_, y_, titles_, timestamps_, comments_ = dedup.drop_duplicates(X_, y_, titles_, timestamps_, comments_, bloom=bloom)
+            main.dropped_pairs["global"] += nb_pairs - len(X_)
+        X.extend(X_)
+        y.extend(y_)
+        titles.extend(titles_)
+        timestamps.extend(timestamps_)
+        comments.extend(comments_)
+        buffer_size += main.estimate_size(X_, y_, titles_, timestamps_, comments_)
+
+        if main.should_flush(len(X), buffer_size, last_save, save_interval):
+            main.save_progress(X, y, titles, timestamps, comments, save_path, "pipeline", c)
+            c += 1
+            buffer_size = 0
+            last_save = time.time()
+            X = []
+            y = []
+            titles = []
+            timestamps = []
+            comments = []
+
+    # Final save
+    main.save_progress(X, y, titles, timestamps, comments, save_path, "pipeline", c)
+    if bloom is not None:
+        logging.info(f"Writer: {main.dropped_pairs['global']} duplicate pairs dropped")
+
+
+def run_pipeline(file_paths: list[str], namespace: str, extracted_titles: frozenset, save_path: str, num_workers: int, max_revisions=1800, min_revisions=25, save_interval=3600, queue_size=64, progress_queue=None) -> None:
+    """
+    Extracts the wikipedia dump files with a reader process, num_workers page workers and a writer process (num_workers + 2 processes in total). The dump files are deleted once the extraction is complete.
+    The completion (or the error) of every file is recorded in save_path/files_status.txt (see main.record_file_status). A file that couldn't be read isn't deleted, and no file is deleted if a process of the pipeline failed.
+    Args:
+        - file_paths: complete paths to the wikipedia dump .xml (or .bz2/.7z) files to extract.
+        - num_workers: the number of page workers.
+        - queue_size: the maximum number of pages (and of results) waiting in the queues.
+        - progress_queue: the queue of a progress.Monitor, None: no progress reported.
+        - the other arguments are the same as main.extract_file.
+    """
+    page_queue = multiprocessing.Queue(queue_size)
+    result_queue = multiprocessing.Queue(queue_size)
+    failed_queue = multiprocessing.Queue()
+
+    processes = [multiprocessing.Process(target=reader, args=(file_paths, namespace, page_queue, num_workers, progress_queue, failed_queue), name="reader")]
+    for n in range(num_workers):
+        processes.append(multiprocessing.Process(target=page_worker, args=(namespace, extracted_titles, max_revisions, min_revisions, n, page_queue, result_queue, save_path, progress_queue), name=f"page_worker_{n}"))
+    processes.append(multiprocessing.Process(target=writer, args=(result_queue, save_path, num_workers, save_interval), name="writer"))
+
+    for process in processes:
+        process.start()
+    supervise(processes, page_queue, result_queue)
+
+    failed_files = {}
+    while not failed_queue.empty():
+        file_path, error = failed_queue.get()
+        failed_files[file_path] = error
+    if any(process.exitcode != 0 for process in processes):
+        logging.error("A process of the extraction pipeline failed, the dump files are not deleted.")
+        for file_path in file_paths:
+            main.record_file_status(save_path, file_path, failed_files.get(file_path, "extraction pipeline failed"))
+        return
+    for file_path in file_paths:
+        main.record_file_status(save_path, file_path, failed_files.get(file_path))
+        if file_path not in failed_files:
+            logging.info(f"Done extracting. Deleting file: {file_path}")
+            os.remove(file_path)
+
+
+def supervise(processes: list, page_queue, result_queue) -> None:
+    """
+    Waits for the processes of the pipeline (the reader, the page workers and the writer, in this order) to end.
+    A stage that dies without its end messages (e.g. killed, or crashed in C code) would block the next stage forever, so they are sent on its behalf: the None of the page workers if the reader fails, the id of a page worker if it fails. If the writer fails, nothing can save the results anymore and the other processes are terminated.
+    If no page worker is left, nothing reads the pages anymore and the reader, blocked on the full page_queue, is terminated.
+    """
+    reader_process, workers, writer_process = processes[0], processes[1:-1], processes[-1]
+    alive = list(processes)
+    while alive:
+        connection.wait([process.sentinel for process in alive])
+        for process in [process for process in alive if not process.is_alive()]:
+            alive.remove(process)
+            if process.exitcode == 0:
+                continue
+            logging.error(f"Process {process.name} of the extraction pipeline exited with code {process.exitcode}")
+            if not writer_process.is_alive():
+                # The writer is done (or failed): nothing reads the results anymore.
+                if process is writer_process:
+                    for other in alive:
+                        other.terminate()
+            elif process is reader_process:
+                # A page worker stops at the first None, the extra ones are never read.
+                for _ in range(sum(worker.is_alive() for worker in workers)):
+                    page_queue.put(None)
+            else:
+                result_queue.put(workers.index(process))
+                if reader_process.is_alive() and not any(worker.is_alive() for worker in workers):
+                    reader_process.terminate()
+    for process in processes:
+        process.join()
@@ -0,0 +1,153 @@
+"""
+Live progress of an extraction across all the worker processes.
+The workers read the dumps through a ProgressReader which sends the number of bytes of the dump read so far to the main process through a queue, at most once every INTERVAL seconds (nothing is done on the hot path in between).
+The main process runs a Monitor thread aggregating the positions of all the files (or shards) into one throughput and ETA display per file and overall.
+"""
+
+import logging
+import os
+import queue as queues
+import threading
+import time
+
+INTERVAL = 10 # in seconds: time between two reports of a worker and between two displays of the monitor.
+
+# Queue to the monitor of the main process, set in the workers (see set_queue). No progress is reported if None.
+queue = None
+# Number of revisions extracted by the worker, reported with the positions (see main.extract_page) or on its own (see report_revisions).
+revisions = 0
+last_revisions_report = 0
+
+
+def set_queue(progress_queue) -> None:
+    """
+    Sets the queue the progress of the worker is sent to. Must be called in the worker processes (e.g. as a pool initializer).
+    """
+    global queue
+    queue = progress_queue
+
+
+class ProgressReader:
+    """
+    Binary file object reporting how many bytes of a dump have been read to the monitor (see Monitor). The other attributes are the ones of the wrapped file.
+    Args:
+        - file: the binary file object to read.
+        - key: the name of the file (or shard) in the display.
+        - total: the size of the file (or shard) in bytes, None if unknown (compressed dumps).
+    """
+
+    def __init__(self, file, key: str, total=None):
+        self.file = file
+        self.key = key
+        self.total = total
+        self.position = 0
+        self.last_report = 0
+
+    def read(self, size=-1) -> bytes:
+        data = self.file.read(size)
+        self.position += len(data)
+        now = time.monotonic()
+        if now - self.last_report >= INTERVAL or not data:
+            self.last_report = now
+            queue.put((self.key, self.position, self.total, not data, os.getpid(), revisions))
+        return data
+
+    def __getattr__(self, name: str):
+        return getattr(self.file, name)
+
+
+def report_revisions(force=False) -> None:
+    """
+    Sends the number of revisions extracted by the worker to the monitor, at most once every INTERVAL seconds unless force. Used by the workers that don't read a dump (see pipeline.page_worker).
+    """
+    global last_revisions_report
+    now = time.monotonic()
+    if queue is not None and (force or now - last_revisions_report >= INTERVAL):
+        last_revisions_report = now
+        queue.put((None, 0, None, False, os.getpid(), revisions))
+
+
+def open_progress(source, key: str, total=None):
+    """
+    Wraps source (a path or a binary file object) in a ProgressReader if a queue has been set (see set_queue), returns source unchanged otherwise.
+    """
+    if queue is None:
+        return source
+    if isinstance(source, str):
+        total = os.path.getsize(source)
+        source = open(source, "rb")
+    elif total is None:
+        total = getattr(source, "size", None) # see sharding.ShardReader
+    return ProgressReader(source, key, total)
+
+
+class Monitor(threading.Thread):
+    """
+    Thread of the main process aggregating the progress reported by the workers and logging it every INTERVAL seconds. Stopped with stop.
+    Args:
+        - progress_queue: the queue set in the workers (see set_queue).
+        - total: the size of all the dumps to extract in bytes, for the overall ETA. None: the sizes of the files reported so far.
+    """
+
+    def __init__(self, progress_queue, total=None):
+        super().__init__(daemon=True)
+        self.queue = progress_queue
+        self.total = total
+        self.files = {} # key -> [position, total, done, first position, first time]
+        self.revisions = {} # worker -> number of revisions extracted
+        self.start_time = time.monotonic()
+
+    def run(self) -> None:
+        last_display = time.monotonic()
+        while True:
+            try:
+                message = self.queue.get(timeout=INTERVAL)
+            except queues.Empty:
+                message = ()
+            if message is None:
+                break
+            if message:
+                key, position, total, done, worker, nb_revisions = message
+                self.revisions[worker] = nb_revisions
+                if key is not None: # None: revisions only (see report_revisions)
+                    if key not in self.files:
+                        self.files[key] = [position, total, done, position, time.monotonic()]
+                    self.files[key][0] = position
+                    self.files[key][2] = done
+            if time.monotonic() - last_display >= INTERVAL:
+                self.display()
+                last_display = time.monotonic()
+        self.display()
+
+    def display(self) -> None:
+        """
+        Logs the position, throughput and ETA of every file being extracted and of the whole extraction.
+        """
+        now = time.monotonic()
+        total_rate = 0
+        remaining = 0
+        for key, (position, total, done, first_position, first_time) in self.files.items():
+            if done:
+                continue
+            rate = (position - first_position) / max(now - first_time, 1e-9)
+            total_rate += rate
+            if total is None:
+                logging.info(f"Progress {key}: {position / 2**20:.0f} MB, {rate / 2**20:.2f} MB/s")
+                continue
+            remaining += max(total - position, 0)
+            eta = (total - position) / rate if rate else (float("inf") if position < total else 0)
+            logging.info(f"Progress {key}: {position / 2**20:.0f}/{total / 2**20:.0f} MB ({position / max(total, 1):.1%}), {rate / 2**20:.2f} MB/s, ETA {eta / 60:.0f} min")
+        position = sum(file[0] for file in self.files.values())
+        if self.total is not None:
+            remaining = max(self.total - position, 0)
+        eta = remaining / total_rate if total_rate else (float("inf") if remaining else 0)
+        done = sum(file[2] for file in self.files.values())
+        revision_rate = sum(self.revisions.values()) / max(now - self.start_time, 1e-9)
+        logging.info(f"Progress overall: {done} files done, {position / 2**20:.0f} MB read, {total_rate / 2**20:.2f} MB/s, {revision_rate:.1f} rev/s, ETA {eta / 60:.0f} min")
+
+    def stop(self) -> None:
+        """
+        Stops the monitor once the workers are done, after a last display.
+        """
+        self.queue.put(None)
+        self.join()
@@ -1,47 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import logging
 import os
 
 
-def _load_data(directory_path: str) -> list[pd.DataFrame]:
+def _get_files(directory_path: str) -> list[str]:
     """
-    Function takes a directory path and returns a list of pandas DataFrame objects from the csv files in the directory.
+    Function takes a directory path and returns the paths of the csv (and parquet) files in the directory.
     """
     # Cheks if the direcory exists
     if not os.path.isdir(directory_path):
         raise ValueError("Path to directory does not exist: " +  directory_path)
-    
-    files_path = os.listdir(directory_path)
-    data = []
-    for file in files_path:
-        if file.endswith(".csv"):
-            data.append(pd.read_csv(directory_path + "\\" + file))
-    return data
 
+    return [directory_path + "\\" + file for file in os.listdir(directory_path) if file.endswith((".csv", ".parquet"))]
 
-def _get_titles(data: list[pd.DataFrame]) -> list[str]:
+
+def _read_titles(file_path: str) -> set[str]:
     """
-    Takes a list of pandas DataFrames, and gets all the different titles in the titles column.
+    Reads only the title column of a csv (or parquet) file of results and returns its different titles.
     """
-    titles = []
+    if file_path.endswith(".parquet"):
+        titles = pd.read_parquet(file_path, columns=["title"])["title"]
+    else:
+        titles = pd.read_csv(file_path, usecols=["title"])["title"]
+    return set(titles.dropna().astype(str))
 
-    for file in data:
-        for title in file["title"]:
-            if not title in titles:
-                titles.append(title)
 
-    return titles
+def _get_titles(files: list[str], threads=8) -> frozenset[str]:
+    """
+    Takes a list of csv (or parquet) files, and gets all the different titles in their title column. The files are read in parallel by threads threads.
+    """
+    titles = set()
+    with ThreadPoolExecutor(threads) as executor:
+        for file_titles in executor.map(_read_titles, files):
+            titles.update(file_titles)
+    return frozenset(titles)
 
 
-def get_extracted_titles(path: str) -> list[str]:
+def get_extracted_titles(path: str, threads=8) -> frozenset[str]:
     """
-    Given a path to a directory with csv files from an extraction, the function gets all the titles of the Wikipedia pages extracted in order for the program to resume where it left off. Returns a list of all the Wikipedia titles present in the directory's csv files in the column 'titles'.
+    Given a path to a directory with csv (or parquet) files from an extraction, the function gets all the titles of the Wikipedia pages extracted in order for the program to resume where it left off. Returns a set of all the Wikipedia titles present in the directory's csv files in the column 'title'.
+    Only the title column of the files is read, and the set can be checked in constant time for every page (see main.extract_page).
     """
     if not path == None:
-        data = _load_data(path)
-        print("Done loading title data")
-        titles = _get_titles(data)
+        files = _get_files(path)
+        titles = _get_titles(files, threads)
         logging.info(f"Number of titles extracted from directory {path} is {len(titles)}")
         return titles
-    return []
-
+    return frozenset()
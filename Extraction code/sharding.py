@@ -0,0 +1,123 @@
+"""
+Tools to split a wikipedia dump (.xml file) into shards at page boundaries, so that a single file can be extracted by multiple workers.
+A shard is a byte range of the dump starting with a <page> tag. It is read with ShardReader, which wraps the pages of the shard between the header of the dump (<mediawiki> and <siteinfo>) and the closing </mediawiki> tag to make a well-formed xml document.
+"""
+
+import os
+from collections import deque
+
+PAGE_TAG = b"<page>"
+END_TAG = b"</mediawiki>"
+READ_SIZE = 1 << 20 # 1 MB
+
+
+def find_next_page(f, offset: int) -> int:
+    """
+    Returns the offset of the first <page> tag at or after offset in the binary file f, or -1 if there is none.
+    The <page> tag can't appear anywhere else in a dump since the text of the revisions is escaped (&lt;page&gt;).
+    """
+    f.seek(offset)
+    overlap = b""
+    position = offset
+    while True:
+        chunk = f.read(READ_SIZE)
+        if not chunk:
+            return -1
+        data = overlap + chunk
+        i = data.find(PAGE_TAG)
+        if i != -1:
+            return position - len(overlap) + i
+        overlap = data[-(len(PAGE_TAG) - 1):]
+        position += len(chunk)
+
+
+def find_end(f) -> int:
+    """
+    Returns the offset of the closing </mediawiki> tag of the binary file f (the size of the file if there is none).
+    """
+    size = f.seek(0, os.SEEK_END)
+    f.seek(max(0, size - READ_SIZE))
+    i = f.read().rfind(END_TAG)
+    if i == -1:
+        return size
+    return max(0, size - READ_SIZE) + i
+
+
+def get_shards(file_path: str, shard_size: int) -> tuple[int, list[tuple[int, int]]]:
+    """
+    Splits a wikipedia dump in shards of about shard_size bytes each starting at a <page> tag.
+    Returns a tuple (header_end, shards) where header_end is the offset of the first page (the header of the dump is before it) and shards is a list of the (start, end) byte ranges of the shards.
+    """
+    shards = []
+    with open(file_path, "rb") as f:
+        end = find_end(f)
+        start = find_next_page(f, 0)
+        header_end = start
+        while start != -1 and start < end:
+            next_start = find_next_page(f, start + shard_size)
+            if next_start == -1 or next_start > end:
+                next_start = end
+            shards.append((start, next_start))
+            start = next_start
+    return header_end, shards
+
+
+class ShardReader:
+    """
+    Read only binary file object reading a shard of a wikipedia dump as a well-formed xml document: the header of the dump, the pages of the shard and the closing </mediawiki> tag.
+    Can be given to lxml.etree.iterparse in place of a file path.
+    """
+
+    def __init__(self, file_path: str, start: int, end: int, header_end: int):
+        self.file = open(file_path, "rb")
+        self.header = self.file.read(header_end)
+        self.file.seek(start)
+        self.remaining = end - start
+        self.footer = END_TAG + b"\n"
+        self.size = len(self.header) + self.remaining + len(self.footer) # Number of bytes to read.
+        self.ranges = deque() # The (start, end) byte ranges to read after this one (see PagesReader).
+
+    def read(self, size=-1) -> bytes:
+        if size is None or size < 0:
+            size = len(self.header) + self.remaining + len(self.footer)
+        data = b""
+        if self.header:
+            data, self.header = self.header[:size], self.header[size:]
+        while len(data) < size and self.remaining:
+            chunk = self.file.read(min(size - len(data), self.remaining))
+            self.remaining -= len(chunk)
+            if not chunk: # The file is shorter than expected.
+                self.remaining = 0
+            data += chunk
+            if not self.remaining and self.ranges:
+                start, end = self.ranges.popleft()
+                self.file.seek(start)
+                self.remaining = end - start
+        if len(data) < size and not self.remaining:
+            data, self.footer = data + self.footer[:size - len(data)], self.footer[size - len(data):]
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class PagesReader(ShardReader):
+    """
+    ShardReader reading several byte ranges of a wikipedia dump one after the other, e.g. single pages (see get_page_ranges), as a single well-formed xml document.
+    """
+
+    def __init__(self, file_path: str, ranges: list[tuple[int, int]], header_end: int):
+        super().__init__(file_path, ranges[0][0], ranges[0][1], header_end)
+        self.ranges = deque(ranges[1:])
+        self.size += sum(end - start for start, end in self.ranges)
+
+
+def get_page_ranges(f, offsets: list[int], end: int) -> list[tuple[int, int]]:
+    """
+    Returns the (start, end) byte ranges of the pages starting at offsets in the binary file f, in order. A page ends at the next <page> tag, or at end (the end of the pages of the dump or of the shard).
+    """
+    ranges = []
+    for offset in sorted(offsets):
+        next_page = find_next_page(f, offset + len(PAGE_TAG))
+        ranges.append((offset, end if next_page == -1 or next_page > end else next_page))
+    return ranges
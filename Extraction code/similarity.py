@@ -0,0 +1,89 @@
+"""
+Similarity kernels used to score a sentence against its candidate corrections during the alignment.
+Two kernels are provided:
+    - difflib: SequenceMatcher.ratio, the kernel used by difflib.get_close_matches.
+    - lcs: 2*LCS/(len(a)+len(b)) where the length of the longest common subsequence is computed with the bit-parallel algorithm of Allison-Dix/Hyyrö (one big integer operation per character). The computation is aborted as soon as the ratio provably falls below the cutoff.
+A kernel is selected by name with get_scorer.
+"""
+
+from difflib import SequenceMatcher
+
+
+def get_masks(word: str) -> dict:
+    """
+    Returns the match masks of word used by lcs_ratio: a dict mapping every character of word to an int with the bits of its positions in word set.
+    """
+    masks = {}
+    for i, char in enumerate(word):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def lcs_ratio(word: str, x: str, cutoff=0.0, masks=None):
+    """
+    Returns 2*LCS(word, x)/(len(word)+len(x)), or None as soon as the ratio is certain to be lower than cutoff.
+    Args:
+        - word, x: the strings to compare.
+        - cutoff: float in the range [0, 1].
+        - masks: the masks of word (see get_masks), to avoid recomputing them when word is compared to many strings.
+    """
+    total = len(word) + len(x)
+    if not total:
+        return 1.0
+    # Same upper bound as SequenceMatcher.real_quick_ratio.
+    if 2.0 * min(len(word), len(x)) / total < cutoff:
+        return None
+    if masks is None:
+        masks = get_masks(word)
+
+    length = len(word)
+    full = (1 << length) - 1
+    v = full
+    remaining = len(x)
+    for char in x:
+        u = v & masks.get(char, 0)
+        v = ((v + u) | (v - u)) & full
+        remaining -= 1
+        # The LCS can at most grow by one for every remaining character of x.
+        if 2.0 * (length - v.bit_count() + remaining) / total < cutoff:
+            return None
+
+    ratio = 2.0 * (length - v.bit_count()) / total
+    if ratio < cutoff:
+        return None
+    return ratio
+
+
+def _difflib_scorer(word: str, cutoff: float):
+    s = SequenceMatcher()
+    s.set_seq2(word)
+
+    def score(x: str):
+        s.set_seq1(x)
+        if s.real_quick_ratio() >= cutoff and s.quick_ratio() >= cutoff:
+            ratio = s.ratio()
+            if ratio >= cutoff:
+                return ratio
+        return None
+    return score
+
+
+def _lcs_scorer(word: str, cutoff: float):
+    masks = get_masks(word)
+
+    def score(x: str):
+        return lcs_ratio(word, x, cutoff, masks)
+    return score
+
+
+KERNELS = {"difflib": _difflib_scorer, "lcs": _lcs_scorer}
+
+
+def get_scorer(kernel: str, word: str, cutoff=0.0):
+    """
+    Returns a function scoring a string against word with the kernel named kernel ("difflib" or "lcs"). The function returns the similarity ratio, or None if it is lower than cutoff.
+    """
+    try:
+        return KERNELS[kernel](word, cutoff)
+    except KeyError:
+        raise ValueError(f"Unknown similarity kernel: {kernel}. Available kernels: {', '.join(KERNELS)}")
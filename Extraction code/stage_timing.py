@@ -0,0 +1,85 @@
+"""
+Optional timing of the stages of the extraction (main.profile_stages).
+The functions of the hot path (pre_cleaner, split_text, filter_direct_matches, get_close_matches, post_cleaner...) are wrapped by timers adding their number of calls and their time to the totals of the worker, so nothing changes on the hot path when the timing is disabled.
+The pages are also counted by number of revisions (powers of 2) with their size and extraction time, to see which stage costs the most on which kind of page. The totals of a worker are written to a json report (see save_report).
+"""
+
+import functools
+import json
+import os
+import time
+
+# stage -> [number of calls, time in seconds]
+stages = {}
+# power of 2 of the number of revisions -> [number of pages, number of revisions, size of the texts in bytes, time in seconds]
+pages = {}
+_instrumented = set()
+
+
+def timed(stage: str, func):
+    """
+    Returns func wrapped by a timer adding its calls and time to the totals of stage.
+    """
+    totals = stages.setdefault(stage, [0, 0.0])
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            totals[0] += 1
+            totals[1] += time.perf_counter() - start
+
+    return wrapper
+
+
+def instrument(module, name: str, stage=None) -> None:
+    """
+    Replaces the function name of module by a timed version (see timed). The module must call the function through its module (e.g. tp.pre_cleaner) for the calls to be timed. Does nothing if the function is already timed.
+    Args:
+        - module: the module (or class) of the function.
+        - name: the name of the function in module.
+        - stage: the name of the stage in the report. The name of the function if None.
+    """
+    key = (id(module), name)
+    if key in _instrumented:
+        return
+    _instrumented.add(key)
+    setattr(module, name, timed(stage or name, getattr(module, name)))
+
+
+def record_page(nb_revisions: int, nb_bytes: int, elapsed: float) -> None:
+    """
+    Adds an extracted page to the page totals.
+    Args:
+        - nb_revisions: the number of revisions of the page.
+        - nb_bytes: the size of the text of its revisions in bytes.
+        - elapsed: the time spent extracting the page in seconds.
+    """
+    bucket = pages.setdefault(max(nb_revisions, 1).bit_length() - 1, [0, 0, 0, 0.0])
+    bucket[0] += 1
+    bucket[1] += nb_revisions
+    bucket[2] += nb_bytes
+    bucket[3] += elapsed
+
+
+def get_report(worker) -> dict:
+    """
+    Returns the totals of the worker since the start of the extraction as a dictionary that can be saved as json.
+    """
+    return {
+        "worker": worker,
+        "stages": {stage: {"calls": calls, "seconds": seconds} for stage, (calls, seconds) in stages.items()},
+        "pages": {f"{2**k}-{2**(k + 1) - 1} revisions": {"pages": nb_pages, "revisions": nb_revisions, "bytes": nb_bytes, "seconds": seconds} for k, (nb_pages, nb_revisions, nb_bytes, seconds) in sorted(pages.items())},
+    }
+
+
+def save_report(save_path: str, worker) -> None:
+    """
+    Writes the report of the worker (see get_report) to save_path/timing_worker_{worker}.json, replacing the previous report of the worker.
+    """
+    path = os.path.join(save_path, f"timing_worker_{worker}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(get_report(worker), f, indent=1)
+    os.replace(path + ".tmp", path)
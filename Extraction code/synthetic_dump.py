@@ -0,0 +1,152 @@
+"""
+Generator of synthetic wikipedia dumps (MediaWiki export-0.10 .xml files) to test and benchmark the extraction without a real frwiki dump (see benchmark_extraction.py). Please set up the variables below to run it as a script.
+The pages are made of french looking sentences with templates, tables, references and image captions, and every revision applies an edit pattern to the previous one: typos, corrections, added or removed paragraphs, vandalism reverted by the next revision and null edits.
+The generated dumps are deterministic for a given seed.
+"""
+import hashlib
+import logging
+import random
+from xml.sax.saxutils import escape
+
+logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO, datefmt="%d %H:%M:%S")
+
+
+# Script settings
+file_path = r"please set up path/synthetic-pages-meta-history.xml"
+nb_pages = 200
+seed = 0
+
+WORDS = "le la les un une des du de et a ou ses son en dans sur sous avec pour par entre depuis chat chien maison ville rivière château église pont route habitants commune région siècle année guerre roi grand petit ancien nouveau célèbre rouge est sont était fut devient construit situé nommé".split()
+# Confusions of french writers, applied as typos and fixed by the corrections: (right, wrong)
+CONFUSIONS = [("a", "à"), ("est", "et"), ("ses", "ces"), ("son", "sont"), ("ou", "où"), ("grand", "grant"), ("siècle", "siecle"), ("année", "anné"), ("église", "eglise"), ("construit", "construi")]
+EDITS = {"typo": 0.25, "correction": 0.3, "add": 0.15, "remove": 0.05, "vandalism": 0.1, "null": 0.05, "rewrite": 0.1} # edit pattern -> probability
+BOT_NAMES = ["Salebot", "OrlodrimBot", "ZéroBot"]
+HEADER = '<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" version="0.10" xml:lang="fr">\n  <siteinfo>\n    <sitename>Wikipédia</sitename>\n    <dbname>frwiki</dbname>\n    <case>first-letter</case>\n  </siteinfo>\n'
+
+
+def make_sentence(rng: random.Random) -> str:
+    """
+    Returns a random sentence of french words.
+    """
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 20))]
+    return words[0].capitalize() + " " + " ".join(words[1:]) + rng.choices(".!?", (8, 1, 1))[0]
+
+
+def make_paragraph(rng: random.Random, template_density=0.4, ref_density=0.3, image_density=0.1, table_density=0.05) -> str:
+    """
+    Returns a paragraph of wikitext. The densities are the probabilities of adding a template, a reference, an image with a caption and a table to the paragraph.
+    """
+    paragraph = " ".join(make_sentence(rng) for _ in range(rng.randint(2, 6)))
+    if rng.random() < template_density:
+        paragraph += rng.choice([" Il mesure {{unité|12|km}}.", " Né le {{date|12|mai|1890}}.", " Au {{s|XIX}}, la [[ville]] grandit.", " {{Lien|Paris|lang=en}} est proche."])
+    if rng.random() < ref_density:
+        paragraph += rng.choice(["<ref>{{Lien web|url=http://example.org|titre=Source}}</ref>", "<ref name=\"a\">{{Ouvrage|auteur=Dupont|titre=Histoire}}</ref>", "<ref name=\"b\" />"])
+    if rng.random() < image_density:
+        paragraph = f"[[Fichier:Image {rng.randint(1, 99)}.jpg|vignette|Le [[château]] de la {make_sentence(rng).lower()}]]\n" + paragraph
+    if rng.random() < table_density:
+        paragraph += "\n{| class=\"wikitable\"\n|-\n! Année !! Habitants\n|-\n| 1900 || " + str(rng.randint(100, 9999)) + "\n|}"
+    return paragraph
+
+
+def make_text(rng: random.Random, nb_paragraphs: int, **densities) -> list[str]:
+    """
+    Returns the blocks of the first revision of a page: an infobox, nb_paragraphs paragraphs and the footer sections.
+    """
+    blocks = ["{{Infobox Commune\n| nom = " + rng.choice(WORDS) + "\n| population = {{formatnum:" + str(rng.randint(100, 99999)) + "}}\n}}"]
+    for _ in range(nb_paragraphs):
+        if rng.random() < 0.2:
+            blocks.append(f"== {rng.choice(WORDS).capitalize()} ==")
+        blocks.append(make_paragraph(rng, **densities))
+    blocks += ["== Notes et références ==", "{{Références}}", "== Voir aussi ==", "* [[Liste des communes]]", "[[Catégorie:Commune]]"]
+    return blocks
+
+
+def edit(blocks: list[str], pattern: str, rng: random.Random, **densities) -> list[str]:
+    """
+    Returns the blocks of a new revision made from blocks with an edit pattern (see EDITS). Vandalism and null edits are handled by write_page.
+    """
+    blocks = list(blocks)
+    i = rng.randrange(1, max(len(blocks) - 5, 2))
+    if pattern in ("typo", "correction"):
+        # A typo replaces a right word by its confusion, a correction does the opposite.
+        old, new = (0, 1) if pattern == "typo" else (1, 0)
+        for pair in rng.sample(CONFUSIONS, len(CONFUSIONS)):
+            if f" {pair[old]} " in blocks[i]:
+                blocks[i] = blocks[i].replace(f" {pair[old]} ", f" {pair[new]} ", 1)
+                break
+    elif pattern == "add":
+        blocks.insert(i, make_paragraph(rng, **densities))
+    elif pattern == "remove" and len(blocks) > 7:
+        blocks.pop(i)
+    elif pattern == "rewrite":
+        sentences = blocks[i].split(". ")
+        k = rng.randrange(len(sentences))
+        sentences[k] = make_sentence(rng)[:-1]
+        blocks[i] = ". ".join(sentences)
+    return blocks
+
+
+def write_revision(f, rev_id: int, k: int, text: str, rng: random.Random, comment: str, minor=False, bot=False) -> None:
+    """
+    Writes the k-th revision of a page to the file f, with the metadata of a real dump (contributor, minor flag, comment, size and sha1 of the text).
+    """
+    data = text.encode("utf-8")
+    contributor = rng.choice(BOT_NAMES) if bot else f"Utilisateur{rng.randint(1, 500)}"
+    f.write(f"    <revision>\n      <id>{rev_id}</id>\n      <timestamp>{2005 + k // 365 % 18}-{k // 28 % 12 + 1:02d}-{k % 28 + 1:02d}T12:00:00Z</timestamp>\n")
+    f.write(f"      <contributor>\n        <username>{escape(contributor)}</username>\n        <id>{rng.randint(1, 99999)}</id>\n      </contributor>\n")
+    if minor:
+        f.write("      <minor />\n")
+    f.write(f"      <comment>{escape(comment)}</comment>\n      <model>wikitext</model>\n      <format>text/x-wiki</format>\n")
+    f.write(f"      <text bytes=\"{len(data)}\" xml:space=\"preserve\">{escape(text)}</text>\n      <sha1>{hashlib.sha1(data).hexdigest()}</sha1>\n    </revision>\n")
+
+
+def write_page(f, page_id: int, title: str, ns: int, nb_revisions: int, rng: random.Random, **densities) -> None:
+    """
+    Writes a page with nb_revisions revisions to the file f.
+    """
+    f.write(f"  <page>\n    <title>{escape(title)}</title>\n    <ns>{ns}</ns>\n    <id>{page_id}</id>\n")
+    blocks = make_text(rng, rng.randint(3, 12), **densities)
+    patterns, weights = zip(*EDITS.items())
+    k = 0
+    while k < nb_revisions:
+        pattern = rng.choices(patterns, weights)[0] if k else "création"
+        if pattern == "vandalism" and k + 1 < nb_revisions:
+            vandalized = list(blocks)
+            vandalized[1] = rng.choice(["N'importe quoi ici. ", "LOL LOL LOL. "]) + vandalized[1]
+            write_revision(f, page_id * 100000 + k, k, "\n\n".join(vandalized), rng, "")
+            write_revision(f, page_id * 100000 + k + 1, k + 1, "\n\n".join(blocks), rng, "Révocation des modifications de vandalisme", bot=rng.random() < 0.5)
+            k += 2
+            continue
+        if pattern not in ("null", "création"):
+            blocks = edit(blocks, pattern, rng, **densities)
+        bot = pattern == "correction" and rng.random() < 0.2
+        write_revision(f, page_id * 100000 + k, k, "\n\n".join(blocks), rng, pattern, minor=pattern in ("typo", "correction") and rng.random() < 0.5, bot=bot)
+        k += 1
+    f.write("  </page>\n")
+
+
+def write_dump(file_path: str, nb_pages=200, min_revisions=25, max_revisions=100, talk_rate=0.1, seed=0, template_density=0.4, ref_density=0.3, image_density=0.1, table_density=0.05) -> None:
+    """
+    Writes a synthetic wikipedia dump to file_path.
+    Args:
+        - nb_pages: the number of pages of the dump.
+        - min_revisions, max_revisions: the range of the number of revisions of the pages.
+        - talk_rate: the proportion of talk pages (namespace 1), which the extraction skips.
+        - seed: the seed of the random generator.
+        - template_density, ref_density, image_density, table_density: the probabilities of a paragraph to have a template, a reference, an image caption and a table.
+    """
+    rng = random.Random(seed)
+    densities = {"template_density": template_density, "ref_density": ref_density, "image_density": image_density, "table_density": table_density}
+    with open(file_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(HEADER)
+        for page_id in range(1, nb_pages + 1):
+            ns = 1 if rng.random() < talk_rate else 0
+            title = ("Discussion:" if ns else "") + f"Commune {page_id}"
+            write_page(f, page_id, title, ns, rng.randint(min_revisions, max_revisions), rng, **densities)
+        f.write("</mediawiki>\n")
+
+
+if __name__ == "__main__":
+    logging.info(f"Writing a synthetic dump of {nb_pages} pages to {file_path}")
+    write_dump(file_path, nb_pages, seed=seed)
+    logging.info("Done")
@@ -30,6 +30,11 @@ UNIT_CONVERSION1 = re.compile("\\{\\{convert\\|(\\d+)\\|([^|]+)\\}\\}")
 UNIT_CONVERSION2 = re.compile("\\{\\{convert\\|(\\d+)\\|([^|]+)\\|[^}]+\\}\\}")
 MULT_NL_PATT = re.compile("[\\n\\r][\\n\\r]+")
 REF_PATT = re.compile("<ref.*?>.+?<\/ref>")
+# Events of the state machines of _remove_image_caption, remove_double_bracket and remove_table (see _find_closing): a level is opened by
+# the second char of every "[[" ("{{", "{|"), overlapping ones included, and closed by every "]]" ("}}", "|}").
+BRACKET_EVENTS = re.compile(r"(?<=\[)\[|\]\]")
+BRACE_EVENTS = re.compile(r"(?<=\{)\{|\}\}")
+TABLE_EVENTS = re.compile(r"(?<=\{)\||(?<=\|)\}")
 
 # other patterns
 P2 = re.compile(r"<ref>(?=[A-Z])")
@@ -38,6 +43,7 @@ P2 = re.compile(r"<ref>(?=[A-Z])")
 
 # Check title
 special_title_prefix = ["Média", "Spécial", "Discussion", "Utilisateur", "Discussion utilisateur", "Wikipédia", "Discussion Wikipédia", "Fichier", "Discussion fichier", "MediaWiki", "Discussion MediaWiki", "Modèle", "Discussion modèle", "Aide", "Discussion aide", "Catégorie", "Discussion catégorie", "Portail", "Discussion Portail", "Projet", "Discussion Projet", "Référence", "Discussion Référence", "TimedText", "TimedText talk", "Module", "Discussion module", "Gadget", "Discussion gadget", "Définition de gadget", "Discussion définition de gadget", "Sujet"]
+SPECIAL_TITLE = re.compile("|".join(re.escape(prefix + ":") for prefix in special_title_prefix)) # One search instead of a substring test per prefix (check_title).
 
 def pre_cleaner(content: str):
     """
@@ -50,124 +56,262 @@ def pre_cleaner(content: str):
     """
     content = re.sub(FOOTER_PATT, "", content)
     content = re.sub(HEADINGS, "", content)
-    content = remove_image_captions(content)
-    content = remove_table(content)
-    content = re.sub(REF_PATT, "", content)
-    content = ct.remove_templates(ct.remove_templates(content))
-    content = remove_double_bracket(content)
+    return remove_markup(content)
+
+
+def remove_markup(content: str, strict=False) -> str:
+    """
+    Removes the image captions, tables, references and templates of the text (the end of pre_cleaner, once the headings are removed), one pass of MARKUP_PASSES after the other.
+    Args:
+        content: corpus of text
+        strict: raises UnterminatedConstruct instead of cutting the text at an unterminated caption, table or template.
+    """
+    for remove in MARKUP_PASSES:
+        content = remove(content, strict)
     return content
 
 
-def remove_image_captions(s):
-    return _remove_image_caption(_remove_image_caption(s, "[[File:"), "[[Image:")
+class UnterminatedConstruct(Exception):
+    """
+    Raised by the strict removals (see remove_markup) when a construct isn't closed before the end of the text.
+    The events and closing of the state machine of the construct (see _find_closing) and its level at the end of the text are kept to look for its end in the next blocks (see pre_cleaner_incremental).
+    """
 
+    def __init__(self, token: str, events, closing: str, level: int):
+        super().__init__(token)
+        self.events = events
+        self.closing = closing
+        self.level = level
 
-def _remove_image_caption(s, label):
-    DEFAULT = 0
-    STATE_1CLOSE_BRACE = 1
-    STATE_1OPEN_BRACE = 2
 
-    i = s.find(label)
-    while i != -1:
-        state = DEFAULT
-        level = 1
-        cur = i + len(label)
-        while cur < len(s):
-            if state == STATE_1OPEN_BRACE and s[cur] == "[":
-                level += 1
-                state = DEFAULT
-            if state == STATE_1OPEN_BRACE:
-                state = DEFAULT
-            if s[cur] == "[":
-                state = STATE_1OPEN_BRACE
-            if state == STATE_1CLOSE_BRACE and s[cur] == "]":
-                level -= 1
-                if level == 0:
-                    break
-                state = DEFAULT
-            else:
-                if state == STATE_1CLOSE_BRACE:
-                    state = DEFAULT
-                if s[cur] == "]":
-                    state = STATE_1CLOSE_BRACE
-            cur += 1
-        if (cur == len(s)):
-            return s[:i]
-        s = f"{s[:i]}{s[cur + 1:]}"
-        i = s.find(label, i)
-    return s 
-
-
-def remove_double_bracket(s):
-    DEFAULT = 0
-    STATE_1CLOSE_BRACE = 1
-    STATE_1OPEN_BRACE = 2
-
-    i = s.find("{{")
-    while i != -1:
-        state = DEFAULT
-        level = 1
-        cur = i + 2
-        while cur < len(s):
-            if state == STATE_1OPEN_BRACE and s[cur] == "{":
-                level += 1
-                state = DEFAULT
-            if state == STATE_1OPEN_BRACE:
-                state = DEFAULT
-            if s[cur] == "{":
-                state = STATE_1OPEN_BRACE
-            if state == STATE_1CLOSE_BRACE and s[cur] == "}":
-                level -= 1
-                if level == 0:
-                    break
-                state = DEFAULT
-            else:
-                if state == STATE_1CLOSE_BRACE:
-                    state = DEFAULT
-                if s[cur] == "}":
-                    state = STATE_1CLOSE_BRACE
-            cur += 1
-        if (cur == len(s)):
-            return s[:i]
-        s = f"{s[:i]}{s[cur + 1:]}"
-        i = s.find("{{", i + 1)
-    return s
-
-
-def remove_table(s):
-    DEFAULT = 0
-    STATE_PIPE = 1
-    STATE_1OPEN_BRACE = 2
-
-    i = s.find("{|")
+BALANCED = (0, 0, 0)
+
+
+def split_blocks(content: str, balances=None) -> list[str]:
+    """
+    Splits an article into candidate blocks of paragraphs for pre_cleaner_incremental. The article is only split at blank lines where the templates, tables and links seem balanced.
+    "\n\n".join(split_blocks(content)) == content
+    Args:
+        content: corpus of text
+        balances: a dict mapping paragraphs to their balance of templates, tables and links, updated in place. The paragraphs already in it aren't counted again.
+    """
+    if balances is None:
+        balances = {}
+    blocks = []
+    current = []
+    templates = tables = links = 0
+    for paragraph in content.split("\n\n"):
+        balance = balances.get(paragraph)
+        if balance is None:
+            balance = (paragraph.count("{{") - paragraph.count("}}"), paragraph.count("{|") - paragraph.count("|}"), paragraph.count("[[") - paragraph.count("]]"))
+            balances[paragraph] = balance = BALANCED if balance == BALANCED else balance
+        if balance is BALANCED and not current:
+            blocks.append(paragraph)
+            continue
+        current.append(paragraph)
+        templates += balance[0]
+        tables += balance[1]
+        links += balance[2]
+        if not templates and not tables and not links:
+            blocks.append("\n\n".join(current))
+            current = []
+    if current:
+        blocks.append("\n\n".join(current))
+    return blocks
+
+
+def pre_cleaner_incremental(content: str, cache: dict) -> str:
+    """
+    Incremental version of pre_cleaner for consecutive revisions of the same page, with the same output. The footer is removed from the whole article, which is then split into blocks (see split_blocks), and the passes of CLEANING_PASSES are applied block by block: only the blocks that aren't in the cache are cleaned.
+    None of these passes goes over a blank line, except to look for the end of an unterminated construct. A block is cleaned on its own up to the first pass finding one (see _apply_passes), the end of the construct is then looked for in the next blocks with their level changes (see _get_level_changes): the blocks up to its end are merged and cleaned again, or the text is cut at the construct if it has no end, as pre_cleaner does. So every pass gives the same text as on the whole article.
+    The blocks are split before the headings are removed: HEADINGS can remove the "}}" of a template with "=" in its parameters, which would unbalance the blocks. A heading never goes over a blank line, so it is removed block by block like the markup.
+    The cache keeps the paragraphs, blocks, merged blocks and level changes of the previous revision. It is updated in place to only keep those of this revision, so its size stays bounded by the size of one article.
+    Args:
+        content: corpus of text
+        cache: a dict owned by the caller, should be a new empty dict for every page.
+    """
+    content = re.sub(FOOTER_PATT, "", content)
+    balances = cache.setdefault("balances", {})
+    states = cache.setdefault("states", {})
+    new_cache = {"states": {}, "levels": {}}
+    new_states = new_cache["states"]
+    keys = split_blocks(content, balances)
+    blocks = [states.get(block) or _apply_passes([block]) for block in keys]
+    new_states.update(zip(keys, blocks))
+    nb_passes = len(CLEANING_PASSES)
+    stopped = [k for k, cleaned in enumerate(blocks) if len(cleaned) <= nb_passes]
+    while stopped:
+        # The first block stopped at the first pass is merged first, as the pass goes over the whole article before the next one.
+        k = min(stopped, key=lambda i: (len(blocks[i]), i))
+        merged = _merge_blocks(blocks, k, len(blocks[k]) - 1, cache, new_cache)
+        stopped = [i if i < k else i - merged + 1 for i in stopped if i < k or i >= k + merged]
+        if len(blocks[k]) <= nb_passes:
+            stopped.append(k)
+    if len(balances) > 2 * len(new_states) + 100:
+        balances = {paragraph: balances[paragraph] for paragraph in content.split("\n\n")}
+    cache.clear()
+    cache.update(new_cache, balances=balances)
+    return "\n\n".join(cleaned[-1] for cleaned in blocks)
+
+
+def _apply_passes(texts: list, strict=True) -> tuple:
+    """
+    Applies the passes of CLEANING_PASSES to the last text of texts, from the pass len(texts) - 1, until a pass finds an unterminated construct. Belongs to pre_cleaner_incremental.
+    Returns texts with the text given to every pass and the text returned by the last one: a block is cleaned if len(texts) == len(CLEANING_PASSES) + 1, it stopped at the pass len(texts) - 1 otherwise.
+    """
+    for remove in CLEANING_PASSES[len(texts) - 1:]:
+        try:
+            texts.append(remove(texts[-1], strict))
+        except UnterminatedConstruct:
+            break
+    return tuple(texts)
+
+
+def _merge_blocks(blocks: list, k: int, n: int, cache: dict, new_cache: dict) -> int:
+    """
+    Applies the pass n to the block k, which stopped at an unterminated construct, with the next blocks up to the end of the construct (the blocks are replaced in place by the merged block), or cuts the text at the construct if it has no end. Belongs to pre_cleaner_incremental.
+    Returns the number of blocks replaced by the merged block.
+    Args:
+        - blocks: the texts of the blocks, see _apply_passes. The blocks after k went through the pass n - 1.
+        - cache, new_cache: the merged blocks ("states") and level changes ("levels", see _get_level_changes) of the previous revision and of this one.
+    """
+    states, new_states = cache.setdefault("states", {}), new_cache["states"]
+    levels, new_levels = cache.setdefault("levels", {}), new_cache["levels"]
+    text = blocks[k][n]
+    end = k + 1
+    while True:
+        key = (n, text)
+        cleaned = new_states.get(key) or states.get(key)
+        if cleaned is None:
+            try:
+                cleaned = _apply_passes([None] * n + [text, CLEANING_PASSES[n](text, True)])
+            except UnterminatedConstruct as error:
+                cleaned = error
+        new_states[key] = cleaned
+        if not isinstance(cleaned, UnterminatedConstruct):
+            blocks[k:end] = [cleaned]
+            return end - k
+        level = cleaned.level
+        for i in range(end, len(blocks)):
+            key = (n, blocks[i][n])
+            changes = new_levels.get(key) or levels.get(key) or _get_level_changes(key[1], 0, cleaned.events, cleaned.closing)
+            new_levels[key] = changes
+            if level + changes[0] <= 0: # closed in the block i
+                break
+            level += changes[1]
+        else:
+            # The construct has no end: the text is cut at the construct and the next blocks are dropped.
+            merged = len(blocks) - k
+            blocks[k:] = [_apply_passes([None] * n + [text], strict=False)]
+            return merged
+        end = i + 1
+        text = "\n\n".join(block[n] for block in blocks[k:end])
+
+
+def remove_image_captions(s, strict=False):
+    return _remove_image_captions(_remove_file_captions(s, strict), strict)
+
+
+def _remove_file_captions(s, strict=False):
+    return _remove_image_caption(s, "[[File:", strict)
+
+
+def _remove_image_captions(s, strict=False):
+    return _remove_image_caption(s, "[[Image:", strict)
+
+
+def _remove_image_caption(s, label, strict=False):
+    return _remove_spans(s, label, BRACKET_EVENTS, "]]", 0, strict)
+
+
+def remove_double_bracket(s, strict=False):
+    # The search resumes one char after the removed template, so a template right after it is kept.
+    return _remove_spans(s, "{{", BRACE_EVENTS, "}}", 1, strict)
+
+
+def remove_table(s, strict=False):
+    return _remove_spans(s, "{|", TABLE_EVENTS, "|}", 0, strict)
+
+
+def _remove_headings(s, strict=False):
+    # A heading never goes over a blank line, there is no construct to terminate.
+    return re.sub(HEADINGS, "", s)
+
+
+def _remove_refs(s, strict=False):
+    return re.sub(REF_PATT, "", s)
+
+
+def _remove_templates(s, strict=False):
+    # The templates cleaned by ct.remove_templates are on one line, there is no construct to terminate.
+    return ct.remove_templates(ct.remove_templates(s))
+
+
+# The passes of remove_markup, in order. Every pass takes the text and strict (see remove_markup), and only the passes of _remove_spans raise UnterminatedConstruct.
+# The image captions are removed in two passes so that an unterminated caption is looked for in the text the pass gets (see pre_cleaner_incremental).
+MARKUP_PASSES = (_remove_file_captions, _remove_image_captions, remove_table, _remove_refs, _remove_templates, remove_double_bracket)
+# The passes of pre_cleaner_incremental, once the footer is removed.
+CLEANING_PASSES = (_remove_headings,) + MARKUP_PASSES
+
+
+def _remove_spans(s: str, token: str, events, closing: str, skip: int, strict=False) -> str:
+    """
+    Removes every construct starting with token from s, the text is cut at the first unterminated one. The kept spans are collected and joined once, so the cost is linear in the size of s.
+    Args:
+        - events, closing: the state machine of the construct (see _find_closing).
+        - skip: the number of chars after a removed construct where no construct is searched.
+        - strict: raises UnterminatedConstruct instead of cutting the text.
+    """
+    result = []
+    pos = 0
+    i = s.find(token)
     while i != -1:
-        state = DEFAULT
-        level = 1
-        cur = i + 2
-        while cur < len(s):
-            if state == STATE_1OPEN_BRACE and s[cur] == "|":
-                level += 1
-                state = DEFAULT
-            if state == STATE_1OPEN_BRACE:
-                state = DEFAULT
-            if s[cur] == "{":
-                state = STATE_1OPEN_BRACE
-            if state == STATE_PIPE and s[cur] == "}":
-                level -= 1
-                if level == 0:
-                    break
-                state = DEFAULT
-            else:
-                if state == STATE_PIPE:
-                    state = DEFAULT
-                if s[cur] == "|":
-                    state = STATE_PIPE
-            cur += 1
-        if (cur == len(s)):
-            return s[:i]
-        s = f"{s[:i]}{s[cur + 1:]}"
-        i = s.find("{|", i)
-    return s
+        close = _find_closing(s, i + len(token), events, closing)
+        result.append(s[pos:i])
+        if close == -1:
+            if strict:
+                raise UnterminatedConstruct(token, events, closing, 1 + _get_level_changes(s, i + len(token), events, closing)[1])
+            return "".join(result)
+        pos = close + 1
+        i = s.find(token, pos + skip)
+    result.append(s[pos:])
+    return "".join(result)
+
+
+def _find_closing(s: str, start: int, events, closing: str) -> int:
+    """
+    Returns the index of the last char of the closing of the construct opened right before start in s, -1 if it isn't closed.
+    Args:
+        - events: the pattern of the openings and closings of levels (see BRACKET_EVENTS).
+        - closing: the two chars closing a level.
+    """
+    level = 1
+    for match in events.finditer(s, start):
+        if match.start() == start and match.end() == start + 1: # overlaps the opening of the construct
+            continue
+        if match.group()[-1] == closing[1]:
+            level -= 1
+            if not level:
+                return match.end() - 1
+        else:
+            level += 1
+    return -1
+
+
+def _get_level_changes(s: str, start: int, events, closing: str) -> tuple[int]:
+    """
+    Returns the lowest and the last change of level of the state machine of _find_closing over s from start: a construct with the level l at start is closed in s if l + lowest <= 0, its level at the end of s is l + last otherwise.
+    """
+    level = lowest = 0
+    for match in events.finditer(s, start):
+        if match.start() == start and match.end() == start + 1: # overlaps the opening of the construct
+            continue
+        if match.group()[-1] == closing[1]:
+            level -= 1
+            lowest = min(lowest, level)
+        else:
+            level += 1
+    return lowest, level
 
 
 def post_cleaner(content: str):
@@ -221,6 +365,36 @@ def filter_direct_matches(text1: list, text2: list):
 
 
 
+def filter_changed_sentences(text1: list, text2: list):
+    """
+    Hash based version of filter_direct_matches. The sentences are interned to integer ids and the sentences of each list that don't have an identical sentence in the other list are returned, in order.
+    Unlike filter_direct_matches, no diff text is generated: the sentences are returned as they are (without the "! " or "+ " prefix and the "\n").
+    Args: 
+        text1: a list of strings
+        text2: a list of strings
+    """
+    ids = {}
+    ids1 = [ids.setdefault(sentence, len(ids)) for sentence in text1]
+    ids2 = [ids.setdefault(sentence, len(ids)) for sentence in text2]
+    return _get_unmatched(text1, ids1, ids2, len(ids)), _get_unmatched(text2, ids2, ids1, len(ids))
+
+
+def _get_unmatched(text: list, ids: list, other_ids: list, nb_ids: int) -> list:
+    """
+    Returns the sentences of text that have no identical sentence left in the other text (a sentence present twice in text and once in the other text is returned once). Belongs to filter_changed_sentences.
+    """
+    counts = [0] * nb_ids
+    for i in other_ids:
+        counts[i] += 1
+    unmatched = []
+    for sentence, i in zip(text, ids):
+        if counts[i]:
+            counts[i] -= 1
+        else:
+            unmatched.append(sentence)
+    return unmatched
+
+
 SENT_PATT2 = re.compile(r"[A-Z*ÀÂÆÇÉÈÊËÎÏÔŒÙÛÜŸ].+?[.!?]{1,3}(?=\s|$)")
 def split_text(corpus: str) -> list[str]:
     """
@@ -235,6 +409,15 @@ def split_text(corpus: str) -> list[str]:
     return result
 
 
+def split_paragraphs(corpus: str) -> list[str]:
+    """
+    Splits a corpus of text into paragraphs (lines). A sentence of split_text never spans over two lines, so splitting the paragraphs into sentences gives the same sentences as splitting the whole corpus.
+    Args:
+        - corpus: A string.
+    """
+    return corpus.split("\n")
+
+
 # def split_text_regex(corpus):
 #     result = []
 #     try:
@@ -253,7 +436,4 @@ def check_title(title: str):
     Arg:
         - title: string, title of the wikipedia page.
     """
-    for s in special_title_prefix:
-        if s + ":" in title:
-            return True
-    return False
+    return SPECIAL_TITLE.search(title) is not None
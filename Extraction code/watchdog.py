@@ -0,0 +1,82 @@
+"""
+Per-page budgets of the extraction (see main.max_page_seconds and main.max_page_bytes).
+A page whose revisions are too big, or which takes too long to extract (e.g. a malformed revision making the cleaning loops or regexes run for minutes), is aborted and written to the quarantine file of the worker so that it can be retried later without budgets.
+The size budget and the time budget are checked between two revisions. On systems with signal.setitimer (not Windows), the time budget can also interrupt the extraction of a revision with a SIGALRM.
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+
+
+class PageBudgetExceeded(Exception):
+    """
+    Raised when a page exceeds its time or size budget.
+    """
+
+
+class Watchdog:
+    """
+    Time and size budget of the extraction of a page. Started with start, checked with check for every revision and stopped with stop.
+    Args:
+        - max_seconds: the time budget of the page in seconds. None: no time limit.
+        - max_bytes: the size budget of the page (size of the text of its revisions) in bytes. None: no size limit.
+        - hard_timeout: interrupts the extraction with a SIGALRM once the time budget is exceeded if possible (only in the main thread, and not on Windows).
+    """
+
+    def __init__(self, max_seconds=None, max_bytes=None, hard_timeout=False):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.hard_timeout = hard_timeout
+        self.size = 0
+        self.deadline = None
+        self.previous_handler = None # Handler of SIGALRM replaced while the hard timeout is armed.
+
+    def start(self) -> None:
+        self.size = 0
+        self.deadline = None
+        if self.max_seconds is not None:
+            self.deadline = time.perf_counter() + self.max_seconds
+            if self.hard_timeout and hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+                self.previous_handler = signal.signal(signal.SIGALRM, self._alarm)
+                signal.setitimer(signal.ITIMER_REAL, self.max_seconds)
+
+    def _alarm(self, signum, frame) -> None:
+        if self.previous_handler is not None: # Ignores an alarm delivered after stop.
+            raise PageBudgetExceeded(f"time budget of {self.max_seconds}s exceeded")
+
+    def check(self, nb_bytes=0) -> None:
+        """
+        Adds nb_bytes to the size of the page and raises PageBudgetExceeded if a budget is exceeded.
+        """
+        self.size += nb_bytes
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise PageBudgetExceeded(f"size budget of {self.max_bytes} bytes exceeded")
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise PageBudgetExceeded(f"time budget of {self.max_seconds}s exceeded")
+
+    def stop(self) -> None:
+        """
+        Disarms the hard timeout. Can be called more than once.
+        The alarm fires at most once, so if it fires before stop, stop must be called again once the PageBudgetExceeded is caught (see main.extract_page).
+        """
+        if self.previous_handler is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self.previous_handler)
+            self.previous_handler = None
+
+
+def get_quarantine_path(save_path: str, worker) -> str:
+    return os.path.join(save_path, f"quarantine_{worker}.jsonl")
+
+
+def write_quarantine(save_path: str, worker, entries: list[dict]) -> None:
+    """
+    Appends the quarantined pages entries (title, id, offset in the dump if known, reason, and the dump file in the extraction pipeline) to the quarantine file of the worker, one json object per line.
+    """
+    with open(get_quarantine_path(save_path, worker), "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+